@@ -21,10 +21,24 @@ Rule 4
 | Dict with lists                  | Deep copy    |
 | Performance-critical & read-only | Shallow      |
 | Tests / isolation                | Deep         |
+| Big nested data, rare writes     | Copy-on-write|
+| Snapshot big state per request   | Persistent   |
+| Large binary payloads, read-only | Buffer views |
 
 """
 
 import copy
+import io
+import json
+import multiprocessing
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from collections.abc import Mapping, MutableMapping, MutableSequence, Sequence
+from operator import attrgetter, itemgetter, methodcaller
 
 
 # ---------------------------
@@ -40,12 +54,18 @@ def no_copy(original):
 # ---------------------------
 
 def shallow_copy_list(original):
+    if _profiler is not None:
+        return _profiler.record("shallow_copy_list", _COPY_METHOD, original)
     return original.copy()
 
 def shallow_copy_slice(original):
+    if _profiler is not None:
+        return _profiler.record("shallow_copy_slice", _FULL_SLICE, original)
     return original[:]
 
 def shallow_copy_module(original):
+    if _profiler is not None:
+        return _profiler.record("shallow_copy_module", copy.copy, original)
     return copy.copy(original)
 
 
@@ -54,9 +74,1034 @@ def shallow_copy_module(original):
 # ---------------------------
 
 def deep_copy(original):
+    if _profiler is not None:
+        return _profiler.record("deep_copy", copy.deepcopy, original, deep=True)
     return copy.deepcopy(original)
 
 
+# ---------------------------
+# Copy Profiler
+# ---------------------------
+# Opt-in: with CopyProfiler() as profiler, every shallow_copy_* and
+# deep_copy call is recorded per call site (helper, file, line):
+# calls, seconds, bytes allocated (tracemalloc peak during the copy),
+# objects visited, and the depth and widest fan-out of the copied graph.
+# The first `track` deep copies per site are kept alive so report() can
+# flag copies still equal to their source, i.e. never mutated afterwards.
+# When disabled the helpers pay one global lookup and an `is None` test.
+
+_profiler = None
+_COPY_METHOD = methodcaller("copy")
+_FULL_SLICE = itemgetter(slice(None))
+
+
+class CopySiteStats:
+    def __init__(self, helper, filename, lineno, function):
+        self.helper = helper
+        self.site = f"{filename}:{lineno} ({function})"
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.objects = 0
+        self.max_depth = 0
+        self.max_fan_out = 0
+        self.tracked = []  # (original, copy) pairs of deep copies
+        self.never_mutated = 0
+
+    def __repr__(self):
+        return (f"CopySiteStats({self.helper} at {self.site}, calls={self.calls}, "
+                f"seconds={self.seconds:.6f}, bytes={self.bytes}, objects={self.objects}, "
+                f"max_depth={self.max_depth}, max_fan_out={self.max_fan_out}, "
+                f"never_mutated={self.never_mutated}/{len(self.tracked)})")
+
+
+def _children(value):
+    kind = type(value)
+    if kind is dict:
+        return value.values()
+    if kind in (list, tuple, set, frozenset):
+        return value
+    if kind in _ATOMIC or kind is bytes:
+        return ()
+    state = getattr(value, "__dict__", None)
+    return state.values() if state is not None else ()
+
+def _graph_shape(value, deep):
+    """
+    (objects, depth, fan_out) of the graph a copy of value produced.
+    A shallow copy only produced the top level.
+    """
+    if not deep:
+        fan_out = len(_children(value))
+        return 1 + fan_out, 1, fan_out
+    objects = max_depth = max_fan_out = 0
+    seen = set()
+    stack = [(value, 1)]
+    while stack:
+        node, depth = stack.pop()
+        objects += 1
+        children = _children(node)
+        if not children or id(node) in seen:
+            continue
+        seen.add(id(node))
+        max_depth = max(max_depth, depth)
+        max_fan_out = max(max_fan_out, len(children))
+        stack.extend((child, depth + 1) for child in children)
+    return objects, max_depth, max_fan_out
+
+
+class CopyProfiler:
+    def __init__(self, track=16):
+        self.track = track
+        self.sites = {}
+        self._started_tracemalloc = False
+
+    def enable(self):
+        global _profiler
+        if _profiler is not None:
+            raise RuntimeError("a CopyProfiler is already enabled")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        _profiler = self
+
+    def disable(self):
+        global _profiler
+        _profiler = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def record(self, helper, copier, original, deep=False):
+        caller = sys._getframe(2)  # record <- copy helper <- call site
+        code = caller.f_code
+        key = (helper, code.co_filename, caller.f_lineno)
+        stats = self.sites.get(key)
+        if stats is None:
+            stats = self.sites[key] = CopySiteStats(
+                helper, code.co_filename, caller.f_lineno, code.co_name)
+
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = copier(original)
+        stats.seconds += time.perf_counter() - start
+        stats.bytes += tracemalloc.get_traced_memory()[1] - before
+
+        objects, depth, fan_out = _graph_shape(result, deep)
+        stats.calls += 1
+        stats.objects += objects
+        stats.max_depth = max(stats.max_depth, depth)
+        stats.max_fan_out = max(stats.max_fan_out, fan_out)
+        if deep and len(stats.tracked) < self.track:
+            stats.tracked.append((original, result))
+        return result
+
+    def report(self, top=10, key="seconds"):
+        """
+        The `top` sites with the highest `key` (seconds, bytes, objects,
+        calls, ...), with never_mutated filled in for deep copy sites.
+        """
+        for stats in self.sites.values():
+            stats.never_mutated = sum(copied == original for original, copied in stats.tracked)
+        return sorted(self.sites.values(), key=attrgetter(key), reverse=True)[:top]
+
+    def unneeded_deep_copies(self):
+        """
+        Deep copy sites where every tracked copy still equals its source.
+        """
+        self.report(top=None)
+        return [stats for stats in self.sites.values()
+                if stats.tracked and stats.never_mutated == len(stats.tracked)]
+
+
+# ---------------------------
+# Fast Deep Copy (JSON-shaped data)
+# ---------------------------
+# Payloads made only of dict, list, str, int, float, bool and None can be
+# copied without deepcopy's memo dict and per-object dispatch:
+# - iterative (explicit stack), so depth is not limited by recursion
+# - no memo dict: only a set of container ids already copied; the first
+#   container seen twice (shared subtree or cycle) means the payload is not
+#   a tree, and the whole copy is redone by deepcopy to keep the aliasing
+# - anything else (other types, subclasses) -> copy.deepcopy
+
+_ATOMIC = frozenset({str, int, float, bool, type(None)})
+
+
+class _NotJsonTree(Exception):
+    pass
+
+
+def deep_copy_json(original):
+    try:
+        return _copy_json_tree(original)
+    except _NotJsonTree:
+        return copy.deepcopy(original)
+
+def _copy_json_tree(original):
+    kind = type(original)
+    if kind in _ATOMIC:
+        return original
+    if kind is dict:
+        root = {}
+    elif kind is list:
+        root = []
+    else:
+        raise _NotJsonTree
+
+    atomic = _ATOMIC
+    seen = set()
+    stack = [(original, root)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        source, target = pop()
+        if id(source) in seen:
+            raise _NotJsonTree  # shared or cyclic: not a tree
+        seen.add(id(source))
+        if type(source) is dict:
+            for key, value in source.items():
+                kind = type(value)
+                if kind in atomic:
+                    target[key] = value
+                elif kind is dict:
+                    target[key] = child = {}
+                    push((value, child))
+                elif kind is list:
+                    target[key] = child = []
+                    push((value, child))
+                else:
+                    raise _NotJsonTree
+        else:
+            append = target.append
+            for value in source:
+                kind = type(value)
+                if kind in atomic:
+                    append(value)
+                elif kind is dict:
+                    child = {}
+                    append(child)
+                    push((value, child))
+                elif kind is list:
+                    child = []
+                    append(child)
+                    push((value, child))
+                else:
+                    raise _NotJsonTree
+    return root
+
+
+# ---------------------------
+# Copy-on-Write
+# ---------------------------
+# copy_on_write(original) gives the isolation of deep_copy without copying
+# up front. Reads go to the shared original; nested dicts/lists come back
+# wrapped in child proxies. The first write to a container shallow-copies
+# it and every container above it (the mutated path) and links the copies
+# together; everything else stays shared. Any other mutable leaf (set,
+# bytearray, custom object) cannot be watched for writes, so it is
+# deep-copied into the owned path the first time it is read; later reads
+# return that same copy. Rule: do not
+# mutate the original while proxies of it are in use.
+
+def copy_on_write(original):
+    if type(original) is dict:
+        return CowDict(original)
+    if type(original) is list:
+        return CowList(original)
+    return copy.deepcopy(original)
+
+
+class _Cow:
+    __slots__ = ("_data", "_owned", "_parent", "_key", "_children", "_private")
+
+    def __init__(self, data, parent=None, key=None):
+        self._data = data
+        self._owned = False
+        self._parent = parent
+        self._key = key
+        self._children = {}
+        self._private = set()  # ids of leaves this proxy's copy owns
+
+    def _wrap(self, key, value):
+        if type(value) is dict or type(value) is list:
+            child = self._children.get(key)
+            if child is None or child._data is not value:
+                child = (CowDict if type(value) is dict else CowList)(value, self, key)
+                self._children[key] = child
+            return child
+        if type(value) in _ATOMIC or type(value) is bytes or id(value) in self._private:
+            return value
+        copied = copy.deepcopy(value)
+        if copied is not value:  # a mutable leaf: hand out a private copy
+            self._materialize()
+            self._data[key] = copied
+            self._private.add(id(copied))
+        return copied
+
+    def _store(self, value):
+        if isinstance(value, _Cow):
+            return value.unwrap()
+        self._private.add(id(value))  # the caller's object, not the original's
+        return value
+
+    def _materialize(self):
+        if self._owned:
+            return
+        original = self._data
+        self._data = original.copy()
+        self._owned = True
+        parent = self._parent
+        if parent is not None:
+            parent._materialize()
+            parent._relink(self._key, original, self._data)
+
+    def unwrap(self):
+        """
+        The current plain structure: copied containers on written paths,
+        shared originals everywhere else. Treat it as read-only.
+        """
+        return self._data
+
+    def __eq__(self, other):
+        return self._data == (other._data if isinstance(other, _Cow) else other)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._data!r})"
+
+
+class CowDict(_Cow, MutableMapping):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self._wrap(key, self._data[key])
+
+    def __setitem__(self, key, value):
+        self._materialize()
+        self._data[key] = self._store(value)
+        self._children.pop(key, None)
+
+    def __delitem__(self, key):
+        self._materialize()
+        del self._data[key]
+        self._children.pop(key, None)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def _relink(self, key, original, replacement):
+        if self._data.get(key) is original:
+            self._data[key] = replacement
+
+
+class CowList(_Cow, MutableSequence):
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CowList(self._data[index])
+        if index < 0:
+            index += len(self._data)
+            if index < 0:
+                raise IndexError("list index out of range")
+        return self._wrap(index, self._data[index])
+
+    def __setitem__(self, index, value):
+        self._materialize()
+        if isinstance(index, slice):
+            self._data[index] = [self._store(v) for v in value]
+            self._children.clear()
+            return
+        self._data[index] = self._store(value)
+        self._children.clear()
+
+    def __delitem__(self, index):
+        self._materialize()
+        del self._data[index]
+        self._children.clear()  # positions shifted
+
+    def insert(self, index, value):
+        self._materialize()
+        self._data.insert(index, self._store(value))
+        self._children.clear()
+
+    def __iter__(self):
+        wrap = self._wrap
+        for index, value in enumerate(self._data):
+            yield wrap(index, value)
+
+    def _relink(self, index, original, replacement):
+        data = self._data
+        if not (index < len(data) and data[index] is original):
+            # An insert/delete moved the child since it was handed out.
+            index = next((i for i, value in enumerate(data) if value is original), None)
+            if index is None:
+                return  # child was removed; it lives on detached
+        data[index] = replacement
+
+    __hash__ = None
+
+
+# ---------------------------
+# Persistent Map / Vector
+# ---------------------------
+# Immutable containers whose updates return a new version that shares all
+# untouched nodes with the old one, so a snapshot is free and an update
+# costs O(log32 n) instead of the O(n) of shallow_copy_list/deep_copy.
+# PersistentMap is a hash array mapped trie (HAMT); PersistentVector is a
+# 32-way trie with a detached tail. transient() returns a mutable builder
+# that edits nodes it created in place, for fast bulk loads.
+
+_HASH_MASK = (1 << 64) - 1
+
+
+class _HamtNode:
+    # array holds, per set bitmap bit: a (hash, key, value) leaf, a child
+    # _HamtNode, or a _Collision.
+    __slots__ = ("bitmap", "array", "edit")
+
+    def __init__(self, bitmap, array, edit):
+        self.bitmap = bitmap
+        self.array = array
+        self.edit = edit
+
+
+class _Collision:
+    # Keys whose full 64-bit hashes are equal.
+    __slots__ = ("hash", "leaves")
+
+    def __init__(self, hash_, leaves):
+        self.hash = hash_
+        self.leaves = leaves
+
+
+_EMPTY_HAMT = _HamtNode(0, [], None)
+
+
+def _editable(node, edit):
+    if edit is not None and node.edit is edit:
+        return node
+    return _HamtNode(node.bitmap, list(node.array), edit)
+
+def _merge_leaves(shift, leaf1, leaf2, edit):
+    if leaf1[0] == leaf2[0]:
+        return _Collision(leaf1[0], [leaf1, leaf2])
+    bit1 = 1 << ((leaf1[0] >> shift) & 31)
+    bit2 = 1 << ((leaf2[0] >> shift) & 31)
+    if bit1 == bit2:
+        return _HamtNode(bit1, [_merge_leaves(shift + 5, leaf1, leaf2, edit)], edit)
+    return _HamtNode(bit1 | bit2, [leaf1, leaf2] if bit1 < bit2 else [leaf2, leaf1], edit)
+
+def _hamt_set(node, shift, h, key, value, edit):
+    """
+    Returns (node, added). node is the input node when nothing changed.
+    """
+    bit = 1 << ((h >> shift) & 31)
+    index = (node.bitmap & (bit - 1)).bit_count()
+    if not node.bitmap & bit:
+        node = _editable(node, edit)
+        node.bitmap |= bit
+        node.array.insert(index, (h, key, value))
+        return node, True
+
+    entry = node.array[index]
+    if type(entry) is tuple:
+        if entry[1] is key or (entry[0] == h and entry[1] == key):
+            if entry[2] is value:
+                return node, False
+            new_entry, added = (h, key, value), False
+        else:
+            new_entry, added = _merge_leaves(shift + 5, entry, (h, key, value), edit), True
+    elif type(entry) is _HamtNode:
+        new_entry, added = _hamt_set(entry, shift + 5, h, key, value, edit)
+        if new_entry is entry:
+            return node, added
+    elif entry.hash == h:
+        leaves = [leaf for leaf in entry.leaves if leaf[1] != key]
+        added = len(leaves) == len(entry.leaves)
+        new_entry = _Collision(h, leaves + [(h, key, value)])
+    else:
+        wrapper = _HamtNode(1 << ((entry.hash >> (shift + 5)) & 31), [entry], edit)
+        new_entry, added = _hamt_set(wrapper, shift + 5, h, key, value, edit)
+
+    node = _editable(node, edit)
+    node.array[index] = new_entry
+    return node, added
+
+def _hamt_delete(node, shift, h, key, edit):
+    """
+    Returns (node, removed); node is None when it became empty.
+    """
+    bit = 1 << ((h >> shift) & 31)
+    if not node.bitmap & bit:
+        return node, False
+    index = (node.bitmap & (bit - 1)).bit_count()
+    entry = node.array[index]
+
+    if type(entry) is tuple:
+        if not (entry[1] is key or (entry[0] == h and entry[1] == key)):
+            return node, False
+        new_entry = None
+    elif type(entry) is _HamtNode:
+        new_entry, removed = _hamt_delete(entry, shift + 5, h, key, edit)
+        if not removed:
+            return node, False
+        if (new_entry is not None and len(new_entry.array) == 1
+                and type(new_entry.array[0]) is not _HamtNode):
+            new_entry = new_entry.array[0]  # pull a lone leaf up a level
+    else:
+        if entry.hash != h:
+            return node, False
+        leaves = [leaf for leaf in entry.leaves if leaf[1] != key]
+        if len(leaves) == len(entry.leaves):
+            return node, False
+        new_entry = leaves[0] if len(leaves) == 1 else _Collision(h, leaves)
+
+    if new_entry is None:
+        if node.bitmap == bit:
+            return None, True
+        node = _editable(node, edit)
+        node.bitmap ^= bit
+        del node.array[index]
+        return node, True
+    node = _editable(node, edit)
+    node.array[index] = new_entry
+    return node, True
+
+def _hamt_leaves(node):
+    for entry in node.array:
+        if type(entry) is tuple:
+            yield entry
+        elif type(entry) is _HamtNode:
+            yield from _hamt_leaves(entry)
+        else:
+            yield from entry.leaves
+
+
+class PersistentMap(Mapping):
+    """
+    Immutable mapping; set/delete/update return new maps sharing structure.
+    """
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, mapping=()):
+        if mapping:
+            builder = _EMPTY_MAP.transient()
+            builder.update(mapping)
+            self._root, self._size = builder._root, builder._size
+        else:
+            self._root, self._size = _EMPTY_HAMT, 0
+
+    @classmethod
+    def _make(cls, root, size):
+        new = cls.__new__(cls)
+        new._root, new._size = root, size
+        return new
+
+    def __getitem__(self, key):
+        h = hash(key) & _HASH_MASK
+        node, shift = self._root, 0
+        while True:
+            bit = 1 << ((h >> shift) & 31)
+            if not node.bitmap & bit:
+                raise KeyError(key)
+            entry = node.array[(node.bitmap & (bit - 1)).bit_count()]
+            if type(entry) is _HamtNode:
+                node, shift = entry, shift + 5
+                continue
+            if type(entry) is tuple:
+                if entry[1] is key or (entry[0] == h and entry[1] == key):
+                    return entry[2]
+                raise KeyError(key)
+            for leaf in entry.leaves:
+                if leaf[1] == key:
+                    return leaf[2]
+            raise KeyError(key)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for leaf in _hamt_leaves(self._root):
+            yield leaf[1]
+
+    def set(self, key, value):
+        root, added = _hamt_set(self._root, 0, hash(key) & _HASH_MASK, key, value, None)
+        if root is self._root:
+            return self
+        return PersistentMap._make(root, self._size + added)
+
+    def delete(self, key):
+        root, removed = _hamt_delete(self._root, 0, hash(key) & _HASH_MASK, key, None)
+        if not removed:
+            raise KeyError(key)
+        return PersistentMap._make(root or _EMPTY_HAMT, self._size - 1)
+
+    def update(self, mapping):
+        builder = self.transient()
+        builder.update(mapping)
+        return builder.persistent()
+
+    def transient(self):
+        return TransientMap(self._root, self._size)
+
+    def __hash__(self):
+        return hash(frozenset((leaf[1], leaf[2]) for leaf in _hamt_leaves(self._root)))
+
+    def __repr__(self):
+        return f"PersistentMap({ {leaf[1]: leaf[2] for leaf in _hamt_leaves(self._root)}!r})"
+
+
+class TransientMap(MutableMapping):
+    """
+    Mutable builder over a PersistentMap. Nodes it copies are tagged with
+    its edit token and changed in place afterwards, so n inserts allocate
+    roughly n leaves instead of n paths. persistent() freezes it.
+    """
+    def __init__(self, root, size):
+        self._root, self._size = root, size
+        self._edit = object()
+
+    def _check(self):
+        if self._edit is None:
+            raise RuntimeError("transient used after persistent()")
+
+    def __getitem__(self, key):
+        self._check()
+        return PersistentMap._make(self._root, self._size)[key]
+
+    def __setitem__(self, key, value):
+        self._check()
+        self._root, added = _hamt_set(
+            self._root, 0, hash(key) & _HASH_MASK, key, value, self._edit)
+        self._size += added
+
+    def __delitem__(self, key):
+        self._check()
+        root, removed = _hamt_delete(self._root, 0, hash(key) & _HASH_MASK, key, self._edit)
+        if not removed:
+            raise KeyError(key)
+        self._root, self._size = root or _EMPTY_HAMT, self._size - 1
+
+    def __iter__(self):
+        self._check()
+        for leaf in _hamt_leaves(self._root):
+            yield leaf[1]
+
+    def __len__(self):
+        return self._size
+
+    def persistent(self):
+        self._check()
+        self._edit = None
+        return PersistentMap._make(self._root, self._size)
+
+
+_EMPTY_MAP = PersistentMap()
+
+
+class _VecNode:
+    __slots__ = ("array", "edit")
+
+    def __init__(self, array, edit):
+        self.array = array
+        self.edit = edit
+
+
+def _vec_editable(node, edit):
+    if edit is not None and node.edit is edit:
+        return node
+    return _VecNode(list(node.array), edit)
+
+def _vec_new_path(level, node, edit):
+    while level:
+        node = _VecNode([node], edit)
+        level -= 5
+    return node
+
+
+class _VecBase:
+    # Shared by PersistentVector and TransientVector: a trie of _VecNode
+    # whose leaves hold 32 items, plus a tail of up to 32 items that has
+    # not been pushed into the trie yet.
+    __slots__ = ()
+
+    def _tail_offset(self):
+        return self._size - len(self._tail)
+
+    def _index(self, index):
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("vector index out of range")
+        return index
+
+    def _get(self, index):
+        tail_offset = self._tail_offset()
+        if index >= tail_offset:
+            return self._tail[index - tail_offset]
+        node, level = self._root, self._shift
+        while level:
+            node = node.array[(index >> level) & 31]
+            level -= 5
+        return node.array[index & 31]
+
+    def _leaves(self):
+        def walk(node, level):
+            if level:
+                for child in node.array:
+                    yield from walk(child, level - 5)
+            else:
+                yield node.array
+        yield from walk(self._root, self._shift)
+        yield self._tail
+
+    def _assoc(self, index, value, edit):
+        def walk(node, level):
+            node = _vec_editable(node, edit)
+            if level:
+                slot = (index >> level) & 31
+                node.array[slot] = walk(node.array[slot], level - 5)
+            else:
+                node.array[index & 31] = value
+            return node
+        return walk(self._root, self._shift)
+
+    def _push_tail(self, tail_node, edit):
+        """
+        Returns (root, shift) with tail_node added as the last leaf.
+        """
+        size, root, shift = self._size, self._root, self._shift
+        if (size >> 5) > (1 << shift):
+            return _VecNode([root, _vec_new_path(shift, tail_node, edit)], edit), shift + 5
+
+        def walk(node, level):
+            node = _vec_editable(node, edit)
+            slot = ((size - 1) >> level) & 31
+            if level == 5:
+                child = tail_node
+            elif slot < len(node.array):
+                child = walk(node.array[slot], level - 5)
+            else:
+                child = _vec_new_path(level - 5, tail_node, edit)
+            if slot < len(node.array):
+                node.array[slot] = child
+            else:
+                node.array.append(child)
+            return node
+        return walk(root, shift), shift
+
+
+class PersistentVector(_VecBase, Sequence):
+    """
+    Immutable sequence; set/append/extend return new vectors sharing
+    every untouched 32-item leaf with the old one.
+    """
+    __slots__ = ("_root", "_shift", "_size", "_tail")
+
+    def __init__(self, iterable=()):
+        self._root, self._shift, self._size, self._tail = _VecNode([], None), 5, 0, []
+        if iterable:
+            builder = self.transient()
+            builder.extend(iterable)
+            self._root, self._shift, self._size, self._tail = (
+                builder._root, builder._shift, builder._size, builder._tail)
+
+    @classmethod
+    def _make(cls, root, shift, size, tail):
+        new = cls.__new__(cls)
+        new._root, new._shift, new._size, new._tail = root, shift, size, tail
+        return new
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PersistentVector(self._get(i) for i in range(*index.indices(self._size)))
+        return self._get(self._index(index))
+
+    def __iter__(self):
+        for leaf in self._leaves():
+            yield from leaf
+
+    def set(self, index, value):
+        index = self._index(index)
+        tail_offset = self._tail_offset()
+        if index >= tail_offset:
+            tail = list(self._tail)
+            tail[index - tail_offset] = value
+            return PersistentVector._make(self._root, self._shift, self._size, tail)
+        return PersistentVector._make(
+            self._assoc(index, value, None), self._shift, self._size, self._tail)
+
+    def append(self, value):
+        if len(self._tail) < 32:
+            return PersistentVector._make(
+                self._root, self._shift, self._size + 1, self._tail + [value])
+        root, shift = self._push_tail(_VecNode(self._tail, None), None)
+        return PersistentVector._make(root, shift, self._size + 1, [value])
+
+    def extend(self, iterable):
+        builder = self.transient()
+        builder.extend(iterable)
+        return builder.persistent()
+
+    def transient(self):
+        return TransientVector(self._root, self._shift, self._size, self._tail)
+
+    def __eq__(self, other):
+        if not isinstance(other, (PersistentVector, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"PersistentVector({list(self)!r})"
+
+
+class TransientVector(_VecBase):
+    """
+    Mutable builder over a PersistentVector; see TransientMap.
+    """
+    __slots__ = ("_root", "_shift", "_size", "_tail", "_edit", "_tail_owned")
+
+    def __init__(self, root, shift, size, tail):
+        self._root, self._shift, self._size, self._tail = root, shift, size, tail
+        self._edit = object()
+        self._tail_owned = False
+
+    def _check(self):
+        if self._edit is None:
+            raise RuntimeError("transient used after persistent()")
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        self._check()
+        return self._get(self._index(index))
+
+    def __setitem__(self, index, value):
+        self._check()
+        index = self._index(index)
+        tail_offset = self._tail_offset()
+        if index >= tail_offset:
+            if not self._tail_owned:
+                self._tail, self._tail_owned = list(self._tail), True
+            self._tail[index - tail_offset] = value
+        else:
+            self._root = self._assoc(index, value, self._edit)
+
+    def append(self, value):
+        self._check()
+        if len(self._tail) < 32:
+            if not self._tail_owned:
+                self._tail, self._tail_owned = list(self._tail), True
+            self._tail.append(value)
+        else:
+            # An unowned tail is still shared with a persistent version.
+            leaf = self._tail if self._tail_owned else list(self._tail)
+            self._root, self._shift = self._push_tail(_VecNode(leaf, self._edit), self._edit)
+            self._tail, self._tail_owned = [value], True
+        self._size += 1
+
+    def extend(self, iterable):
+        append = self.append
+        for value in iterable:
+            append(value)
+
+    def persistent(self):
+        self._check()
+        self._edit = None
+        return PersistentVector._make(self._root, self._shift, self._size, self._tail)
+
+
+# ---------------------------
+# Zero-Copy Buffers
+# ---------------------------
+# copy.deepcopy duplicates every byte of bytearray/array payloads. Most
+# copies only read them, so deep_copy_buffers:
+# - shares bytes (immutable) as-is
+# - returns a read-only memoryview for bytearray/array/memoryview instead
+#   of a copy (writable=True copies them like deep_copy; a memoryview
+#   becomes a writable view over a private bytearray copy)
+# Views are zero-copy, so they still see later writes to the source
+# buffer, and they pin it (a viewed bytearray cannot be resized). Treat the
+# source buffers as frozen while the copy is alive.
+# For copies to another process, dumps/loads_out_of_band and
+# send/recv_out_of_band use pickle protocol 5 out-of-band buffers: large
+# payloads are handed to the pipe directly instead of being copied into
+# the pickle stream first.
+
+_VIEWABLE = (bytearray, array, memoryview)
+OUT_OF_BAND_MIN_BYTES = 64 * 1024
+
+
+def deep_copy_buffers(original, writable=False):
+    return _copy_sharing_buffers(original, {}, writable)
+
+def _copy_sharing_buffers(value, memo, writable):
+    kind = type(value)
+    if kind in _ATOMIC or kind is bytes:
+        return value
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    if kind in _VIEWABLE:
+        if writable and kind is memoryview:
+            result = memoryview(bytearray(value.tobytes()))
+            if value.ndim != 1 or value.format != "B":
+                result = result.cast(value.format, value.shape)
+        elif writable:
+            result = copy.copy(value)
+        else:
+            result = memoryview(value).toreadonly()
+    elif kind is dict:
+        result = memo[key] = {}
+        for item_key, item in value.items():
+            result[item_key] = _copy_sharing_buffers(item, memo, writable)
+    elif kind is list:
+        result = memo[key] = []
+        append = result.append
+        for item in value:
+            append(_copy_sharing_buffers(item, memo, writable))
+    elif kind is tuple:
+        items = [_copy_sharing_buffers(item, memo, writable) for item in value]
+        if key in memo:  # a cycle through the tuple already copied it
+            return memo[key]
+        result = value if all(a is b for a, b in zip(items, value)) else tuple(items)
+    else:
+        result = copy.deepcopy(value, memo)  # shares the memo, keeps aliasing
+    memo[key] = result
+    return result
+
+
+def _rebuild_buffer(kind, buffer, fmt, shape):
+    if kind is bytes:
+        return buffer if type(buffer) is bytes else bytes(buffer)
+    if kind is bytearray:
+        return buffer if type(buffer) is bytearray else bytearray(buffer)
+    view = memoryview(buffer).cast("B")
+    if kind is array:
+        result = array(fmt)
+        result.frombytes(view)
+        return result
+    return view.cast(fmt, shape)  # memoryview: stays a view of the received bytes
+
+
+class _OutOfBand:
+    # The pickler never offers exact bytes/bytearray to reducer_override,
+    # so large ones are wrapped in this marker before pickling.
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+
+def _mark_out_of_band(value, min_size, memo):
+    kind = type(value)
+    if kind is bytes or kind is bytearray:
+        if len(value) < min_size:
+            return value
+    elif kind is not dict and kind is not list and kind is not tuple:
+        return value
+    key = id(value)
+    if key in memo:
+        return memo[key]
+    if kind is dict:
+        result = memo[key] = {}  # memoised first, so cycles end here
+        for item_key, item in value.items():
+            result[item_key] = _mark_out_of_band(item, min_size, memo)
+    elif kind is list:
+        result = memo[key] = []
+        append = result.append
+        for item in value:
+            append(_mark_out_of_band(item, min_size, memo))
+    elif kind is tuple:
+        items = tuple(_mark_out_of_band(item, min_size, memo) for item in value)
+        # A cycle through the tuple may have built it already; reuse that.
+        result = memo.get(key, items)
+    else:
+        result = _OutOfBand(value)
+    memo[key] = result
+    return result
+
+
+class _OutOfBandPickler(pickle.Pickler):
+    def __init__(self, file, buffer_callback, min_size):
+        super().__init__(file, protocol=5, buffer_callback=buffer_callback)
+        self.min_size = min_size
+
+    def reducer_override(self, obj):
+        if type(obj) is _OutOfBand:
+            obj = obj.obj
+        kind = type(obj)
+        if kind is not bytes and kind not in _VIEWABLE:
+            return NotImplemented
+        view = memoryview(obj)
+        fmt = obj.typecode if kind is array else view.format
+        shape = view.shape  # before a strided view is flattened below
+        if view.nbytes < self.min_size:
+            if kind is not memoryview:
+                return NotImplemented
+            buffer = view.tobytes()  # memoryview has no pickle support of its own
+        else:
+            if not view.contiguous:
+                view = memoryview(view.tobytes())  # C order, flat bytes
+            buffer = pickle.PickleBuffer(view)
+        return _rebuild_buffer, (kind, buffer, fmt, shape)
+
+
+def dumps_out_of_band(obj, min_size=OUT_OF_BAND_MIN_BYTES):
+    """
+    Returns (pickle bytes, list of PickleBuffer). Buffers of at least
+    min_size bytes are referenced, not copied, and must be sent alongside.
+    bytes/bytearray only go out-of-band when reachable through plain
+    dicts, lists and tuples; array and memoryview go out-of-band anywhere.
+    """
+    buffers = []
+    file = io.BytesIO()
+    pickler = _OutOfBandPickler(file, buffers.append, min_size)
+    pickler.dump(_mark_out_of_band(obj, min_size, {}))
+    return file.getvalue(), buffers
+
+def loads_out_of_band(data, buffers):
+    return pickle.loads(data, buffers=buffers)
+
+def send_out_of_band(conn, obj, min_size=OUT_OF_BAND_MIN_BYTES):
+    """
+    Send obj over a multiprocessing Connection, writing each large buffer
+    straight from its source memory.
+    """
+    data, buffers = dumps_out_of_band(obj, min_size)
+    conn.send(len(buffers))
+    conn.send_bytes(data)
+    for buffer in buffers:
+        conn.send_bytes(buffer.raw())
+
+def recv_out_of_band(conn):
+    count = conn.recv()
+    data = conn.recv_bytes()
+    return loads_out_of_band(data, [conn.recv_bytes() for _ in range(count)])
+
+
 # ---------------------------
 # Pytest Tests
 # ---------------------------
@@ -105,5 +1150,563 @@ def test_outer_change_deep():
     new.append([5, 6])
     assert len(original) == 2
 
+@pytest.mark.parametrize("copier", [deep_copy, deep_copy_json, copy_on_write, deep_copy_buffers])
+def test_deep_copy_isolation(copier):
+    original = [[1, 2], [3, 4]]
+    new = copier(original)
+    new[0][0] = 99
+    new.append([5, 6])
+    assert original == [[1, 2], [3, 4]]
+
+    payload = {"user": {"tags": ["a"], "meta": {"n": 1}}, "items": [{"id": 1}]}
+    new = copier(payload)
+    new["user"]["tags"].append("b")
+    new["items"][0]["id"] = 2
+    assert payload == {"user": {"tags": ["a"], "meta": {"n": 1}}, "items": [{"id": 1}]}
+    assert new == {"user": {"tags": ["a", "b"], "meta": {"n": 1}}, "items": [{"id": 2}]}
+
+def test_copy_on_write_shares_until_written():
+    original = {"config": {"limits": [1, 2, 3], "name": "svc"}, "big": [[0] * 10] * 3}
+    view = copy_on_write(original)
+    assert view == original
+    assert view.unwrap() is original  # nothing copied yet
+
+    view["config"]["limits"].append(4)
+    assert original["config"]["limits"] == [1, 2, 3]
+    plain = view.unwrap()
+    assert plain["config"]["limits"] == [1, 2, 3, 4]
+    assert plain is not original and plain["config"] is not original["config"]
+    assert plain["big"] is original["big"]  # untouched branch still shared
+
+    view["big"][1][0] = 7  # the rows of "big" are one aliased list
+    assert view["big"][1][0] == 7 and view["big"][0][0] == 0
+    assert original["big"][1][0] == 0
+
+    view["config"]["name"] = "other"
+    assert original["config"]["name"] == "svc"
+    del view["big"]
+    assert "big" in original
+
+def test_copy_on_write_copies_other_mutable_leaves():
+    original = {"tags": {"a"}, "buf": bytearray(b"xy"), "rows": [[1], ("t", 2)], "big": [[0]]}
+    view = copy_on_write(original)
+    view["tags"].add("b")
+    view["buf"][0] = 90
+    assert view["tags"] == {"a", "b"} and view["buf"] == bytearray(b"Zy")
+    assert original["tags"] == {"a"} and original["buf"] == bytearray(b"xy")
+    assert view["rows"][1] is original["rows"][1]  # immutable leaves stay shared
+    assert view.unwrap()["big"] is original["big"]
+
+    assert copy_on_write(original["tags"]) is not original["tags"]
+
+def test_copy_on_write_leaf_is_copied_once():
+    original = {"tags": {"a"}, "rows": [{"x"}, {"y"}]}
+    view = copy_on_write(original)
+    tags = view["tags"]
+    assert view["tags"] is tags
+    tags.add("b")
+    assert view["tags"] == {"a", "b"}
+
+    first = view["rows"][1]
+    view["rows"].insert(0, set())  # positions shift; the copy stays owned
+    first.add("z")
+    assert view["rows"][2] == {"y", "z"}
+    mine = {"m"}
+    view["mine"] = mine
+    assert view["mine"] is mine
+    assert original == {"tags": {"a"}, "rows": [{"x"}, {"y"}]}
+
+def test_copy_on_write_list_operations():
+    original = [[1, 2], [3, 4], [5, 6]]
+    view = copy_on_write(original)
+
+    held = view[2]
+    view.insert(0, [0])    # shifts positions under the held child
+    held[0] = 50
+    assert view == [[0], [1, 2], [3, 4], [50, 6]]
+    view[-1][1] = 60
+    view[1:2] = [[7]]
+    assert view == [[0], [7], [3, 4], [50, 60]]
+    sliced = view[2:]
+    sliced[0].append(9)
+    assert view[2] == [3, 4]
+    with pytest.raises(IndexError):
+        view[-5]
+    assert -1 not in view._children and -5 not in view._children
+    assert original == [[1, 2], [3, 4], [5, 6]]
+
+class _CollidingKey:
+    def __init__(self, name):
+        self.name = name
+    def __hash__(self):
+        return 42
+    def __eq__(self, other):
+        return isinstance(other, _CollidingKey) and other.name == self.name
+
+def test_persistent_map_matches_dict():
+    rng = random.Random(7)
+    keys = list(range(300)) + [f"k{i}" for i in range(300)] + [_CollidingKey(i) for i in range(5)]
+    current, model = PersistentMap(), {}
+    versions = []
+    for step in range(4_000):
+        key = rng.choice(keys)
+        if key in model and rng.random() < 0.3:
+            current, model = current.delete(key), {k: v for k, v in model.items() if k != key}
+        else:
+            current, model = current.set(key, step), {**model, key: step}
+        if step % 500 == 0:
+            versions.append((current, model))
+    versions.append((current, model))
+    for snapshot, expected in versions:  # old versions are untouched
+        assert len(snapshot) == len(expected)
+        assert dict(snapshot.items()) == expected
+        assert snapshot == expected
+    with pytest.raises(KeyError):
+        PersistentMap({"a": 1}).delete("b")
+    assert PersistentMap({"a": 1}).get("b") is None
+
+def test_persistent_map_transient():
+    base = PersistentMap({i: i for i in range(100)})
+    builder = base.transient()
+    for i in range(50, 150):
+        builder[i] = -i
+    del builder[0]
+    loaded = builder.persistent()
+    assert dict(base.items()) == {i: i for i in range(100)}
+    assert dict(loaded.items()) == {**{i: i for i in range(1, 50)}, **{i: -i for i in range(50, 150)}}
+    with pytest.raises(RuntimeError):
+        builder[1] = 1
+    assert base.update({"x": 1})["x"] == 1 and "x" not in base
+
+@pytest.mark.parametrize("size", [0, 1, 32, 33, 1_056, 1_057, 33_000])
+def test_persistent_vector_matches_list(size):
+    rng = random.Random(size)
+    vector = PersistentVector(range(size))
+    assert list(vector) == list(range(size)) and len(vector) == size
+    model, current = list(range(size)), vector
+    for step in range(200):
+        if size and rng.random() < 0.5:
+            index = rng.randrange(-size, size)
+            current, model[index] = current.set(index, -step), -step
+        else:
+            current = current.append(step)
+            model.append(step)
+    assert current == model
+    assert [current[i] for i in range(len(model))] == model
+    assert vector == list(range(size))  # original version untouched
+    assert current[5:40:3] == model[5:40:3]
+    with pytest.raises(IndexError):
+        vector[size]
+
+def test_persistent_vector_transient_keeps_source():
+    source = PersistentVector(range(40))
+    builder = source.transient()
+    for i in range(40, 100):
+        builder.append(i)
+    builder[0] = "first"
+    builder[35] = "tail"
+    built = builder.persistent()
+    assert list(source) == list(range(40))
+    assert built == ["first"] + list(range(1, 35)) + ["tail"] + list(range(36, 100))
+    with pytest.raises(RuntimeError):
+        builder.append(1)
+
+    full_tail = PersistentVector(range(32))
+    builder = full_tail.transient()
+    builder.append(32)  # pushes the shared tail into the trie
+    builder[0] = "changed"
+    assert full_tail[0] == 0
+
+def test_deep_copy_buffers_shares_instead_of_copying():
+    frame = bytearray(b"frame")
+    original = {"blob": b"x" * 1000, "frames": [frame, frame],
+                "samples": array("d", [1.0, 2.0]), "nested": {"n": [1, 2]}}
+    copied = deep_copy_buffers(original)
+    assert copied["blob"] is original["blob"]
+    assert copied["frames"][0] is copied["frames"][1]  # aliasing preserved
+    assert copied["frames"][0] == frame and copied["frames"][0].readonly
+    assert copied["samples"].tolist() == [1.0, 2.0]
+    with pytest.raises(TypeError):
+        copied["frames"][0][0] = 0
+    copied["nested"]["n"].append(3)
+    assert original["nested"]["n"] == [1, 2]
+
+    writable = deep_copy_buffers(original, writable=True)
+    writable["frames"][0][0] = ord("F")
+    assert frame == bytearray(b"frame") and writable["frames"][1] == bytearray(b"Frame")
+    assert type(writable["samples"]) is array
+
+    grid = memoryview(bytearray(8)).cast("H", (2, 2))
+    view = deep_copy_buffers({"grid": grid}, writable=True)["grid"]
+    view[1, 1] = 7
+    assert not view.readonly and view.shape == (2, 2) and grid[1, 1] == 0
+
+def _buffer_payload(size):
+    return {
+        "blob": bytes(range(256)) * (size // 256),
+        "frame": bytearray(b"\x01") * size,
+        "samples": array("i", range(size // 4)),
+        "grid": memoryview(bytearray(size)).cast("B", (size // 16, 16)),
+        "small": b"tiny",
+        "meta": {"id": 7, "tags": ["a"]},
+    }
+
+def test_out_of_band_round_trip():
+    payload = _buffer_payload(1 << 16)
+    data, buffers = dumps_out_of_band(payload, min_size=1024)
+    assert len(buffers) == 4 and len(data) < 1024  # payload bytes are not in the stream
+    restored = loads_out_of_band(data, [buffer.raw().tobytes() for buffer in buffers])
+    assert restored["blob"] == payload["blob"] and type(restored["blob"]) is bytes
+    assert restored["frame"] == payload["frame"] and type(restored["frame"]) is bytearray
+    assert restored["samples"] == payload["samples"]
+    assert restored["grid"].shape == (4096, 16) and restored["grid"] == payload["grid"]
+    assert restored["small"] == b"tiny" and restored["meta"] == payload["meta"]
+
+    inline, no_buffers = dumps_out_of_band(payload, min_size=1 << 30)
+    assert no_buffers == [] and loads_out_of_band(inline, [])["grid"] == payload["grid"]
+
+def test_out_of_band_strided_views():
+    flat = memoryview(bytearray(range(200))).cast("H")[::2]
+    grid = memoryview(bytearray(range(64))).cast("B", (8, 8))[::2]
+    data, buffers = dumps_out_of_band({"flat": flat, "grid": grid}, min_size=16)
+    restored = loads_out_of_band(data, buffers)
+    assert restored["flat"].tolist() == flat.tolist()
+    assert restored["grid"].shape == (4, 8) and restored["grid"].tolist() == grid.tolist()
+
+def test_deep_copy_buffers_keeps_tuple_cycles():
+    items = []
+    pair = (items, bytearray(b"x"))
+    items.append(pair)
+    copied = deep_copy_buffers(pair)
+    assert copied[0][0] is copied and copied[0] is not items
+
+def test_out_of_band_cyclic_payload():
+    blob = b"x" * 2048
+    cyclic = [blob]
+    cyclic.append(cyclic)
+    pair = ({"blob": blob},)
+    pair[0]["self"] = pair
+    data, buffers = dumps_out_of_band({"list": cyclic, "pair": pair}, min_size=1024)
+    assert len(buffers) == 1  # the shared blob is stored once
+    restored = loads_out_of_band(data, buffers)
+    assert restored["list"][1] is restored["list"] and restored["list"][0] == blob
+    assert restored["pair"][0]["self"] is restored["pair"]
+
+def test_send_out_of_band_over_pipe():
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    payload = _buffer_payload(1 << 12)
+    send_out_of_band(sender, payload, min_size=1024)
+    restored = recv_out_of_band(receiver)
+    assert restored["samples"] == payload["samples"] and restored["frame"] == payload["frame"]
+
+def _copy_twice(original):
+    first = deep_copy(original)
+    second = deep_copy(original)
+    return first, second
+
+def test_copy_profiler_records_call_sites():
+    original = {"a": [1, 2, 3], "b": {"c": [4]}}
+    with CopyProfiler() as profiler:
+        first, second = _copy_twice(original)
+        first["a"].append(99)
+        flat = shallow_copy_list([1, 2])
+        shallow_copy_slice(flat)
+    shallow_copy_list([3])  # disabled again: not recorded
+    assert _profiler is None
+
+    report = profiler.report()
+    assert sorted(stats.helper for stats in report) == [
+        "deep_copy", "deep_copy", "shallow_copy_list", "shallow_copy_slice"]
+    first_site, second_site = sorted(
+        (stats for stats in report if stats.helper == "deep_copy"),
+        key=lambda stats: stats.tracked[0][1] is second)
+    assert first_site.site != second_site.site  # two lines, two sites
+    assert first_site.calls == second_site.calls == 1
+    assert (first_site.objects, first_site.max_depth, first_site.max_fan_out) == (8, 3, 3)
+    assert first_site.bytes > 0 and first_site.seconds > 0
+    listed = next(stats for stats in report if stats.helper == "shallow_copy_list")
+    assert "test_copy_profiler_records_call_sites" in listed.site
+    assert (listed.calls, listed.objects, listed.max_depth, listed.max_fan_out) == (1, 3, 1, 2)
+
+    unneeded = profiler.unneeded_deep_copies()
+    assert unneeded == [second_site]  # first was mutated after the copy
+    assert "never_mutated=1/1" in repr(unneeded[0])
+
+def test_copy_profiler_single_instance():
+    with CopyProfiler():
+        with pytest.raises(RuntimeError):
+            CopyProfiler().enable()
+
+def test_deep_copy_json_falls_back_to_deepcopy():
+    class Point:
+        def __init__(self, x):
+            self.x = x
+
+    original = {"point": Point(1), "pair": (1, [2])}
+    new = deep_copy_json(original)
+    assert new["point"] is not original["point"] and new["point"].x == 1
+    assert new["pair"][1] is not original["pair"][1]
+
+    cyclic = [1]
+    cyclic.append(cyclic)
+    new = deep_copy_json(cyclic)
+    assert new[1] is new and new is not cyclic
+
+def test_deep_copy_json_keeps_shared_subtrees():
+    shared = {"k": [1]}
+    new = deep_copy_json({"a": shared, "b": [shared]})
+    assert new["a"] is new["b"][0] and new["a"] is not shared
+
+    nested = []
+    for _ in range(60):  # copied per reference this would be 2**60 lists
+        nested = [nested, nested]
+    new = deep_copy_json(nested)
+    assert new[0] is new[1] and new is not nested
+
+def test_deep_copy_json_beyond_recursion_limit():
+    depth = 20_000
+    original = leaf = []
+    for _ in range(depth):
+        leaf.append([])
+        leaf = leaf[0]
+    new = deep_copy_json(original)
+    for _ in range(depth):
+        assert new is not original
+        new, original = new[0], original[0]
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+
+def _request_payload(rng, items=50):
+    return {
+        "id": rng.randrange(10**9),
+        "user": {"name": "user", "roles": ["read", "write"], "active": True,
+                 "profile": {"age": rng.randrange(90), "score": rng.random(), "bio": None}},
+        "items": [{"sku": f"sku-{i}", "qty": rng.randrange(5), "price": rng.random() * 100,
+                   "tags": ["sale", "new"][: rng.randrange(3)],
+                   "attrs": {"color": "red", "size": rng.choice(["S", "M", "L"])}}
+                  for i in range(items)],
+    }
+
+def benchmark_deep_copy(payloads=2_000):
+    """
+    copy.deepcopy vs deep_copy_json vs a json round trip on realistic
+    nested request payloads.
+    """
+    rng = random.Random(0)
+    data = [_request_payload(rng) for _ in range(payloads)]
+    results = {}
+    for label, copier in [
+        ("copy.deepcopy", deep_copy),
+        ("deep_copy_json", deep_copy_json),
+        ("json round trip", lambda value: json.loads(json.dumps(value))),
+    ]:
+        start = time.perf_counter()
+        copies = [copier(payload) for payload in data]
+        results[label] = time.perf_counter() - start
+        assert copies == data
+        print(f"{label:<16} {results[label]:>8.3f}s  "
+              f"({payloads / results[label]:>10,.0f} payloads/sec)")
+    return results
+
+
+def _peak_bytes(func):
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+def benchmark_copy_on_write(payloads=1_000, writes=3):
+    """
+    deep_copy vs copy_on_write when each copy receives only a few writes,
+    plus the cost of a read through a proxy vs the original.
+    """
+    rng = random.Random(1)
+    data = [_request_payload(rng) for _ in range(payloads)]
+
+    def mutate(copied):
+        for n in range(writes):
+            copied["items"][n]["qty"] = 99
+        return copied
+
+    results = {}
+    for label, copier in [("deep_copy", deep_copy), ("copy_on_write", copy_on_write)]:
+        start = time.perf_counter()
+        copies = [mutate(copier(payload)) for payload in data]
+        seconds = time.perf_counter() - start
+        _, peak = _peak_bytes(lambda: [mutate(copier(payload)) for payload in data])
+        results[label] = (seconds, peak)
+        assert all(copied["items"][0]["qty"] == 99 for copied in copies)
+        print(f"{label:<14} {seconds:>8.3f}s  {peak / 2**20:>8.1f}MiB peak")
+
+    payload = data[0]
+    view = copy_on_write(payload)
+    for label, target in [("read original", payload), ("read proxy", view)]:
+        start = time.perf_counter()
+        for _ in range(100_000):
+            target["user"]["profile"]["age"]
+        print(f"{label:<14} {(time.perf_counter() - start) * 10:>8.3f}us")
+    return results
+
+def benchmark_persistent(size=100_000, snapshots=200):
+    """
+    Snapshot-plus-one-update: shallow_copy_list/deep_copy of a list/dict vs
+    PersistentVector.set/PersistentMap.set, plus bulk-load via transient.
+    """
+    rng = random.Random(2)
+    state_list = list(range(size))
+    state_dict = {f"key-{i}": i for i in range(size)}
+    vector, mapping = PersistentVector(state_list), PersistentMap(state_dict)
+    positions = [rng.randrange(size) for _ in range(snapshots)]
+
+    def run(label, func):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        print(f"{label:<30} {seconds / snapshots * 1e6:>10.1f}us/snapshot")
+        return seconds
+
+    def list_copies():
+        current = state_list
+        for i in positions:
+            current = shallow_copy_list(current)
+            current[i] = -i
+
+    def dict_copies():
+        current = state_dict
+        for i in positions:
+            current = deep_copy(current)
+            current[f"key-{i}"] = -i
+
+    def vector_sets():
+        current = vector
+        for i in positions:
+            current = current.set(i, -i)
+
+    def map_sets():
+        current = mapping
+        for i in positions:
+            current = current.set(f"key-{i}", -i)
+
+    results = {
+        "shallow_copy_list": run("shallow_copy_list + set", list_copies),
+        "PersistentVector.set": run("PersistentVector.set", vector_sets),
+        "deep_copy": run("deep_copy(dict) + set", dict_copies),
+        "PersistentMap.set": run("PersistentMap.set", map_sets),
+    }
+
+    for label, build in [
+        ("map: set() one at a time", lambda: _fold_set(state_dict)),
+        ("map: transient bulk load", lambda: PersistentMap(state_dict)),
+    ]:
+        start = time.perf_counter()
+        build()
+        results[label] = time.perf_counter() - start
+        print(f"{label:<30} {results[label]:>10.3f}s for {size:,} keys")
+    return results
+
+def _fold_set(mapping):
+    current = PersistentMap()
+    for key, value in mapping.items():
+        current = current.set(key, value)
+    return current
+
+def _ack_in_band(conn):
+    conn.send(len(conn.recv()["blob"]))
+
+def _ack_out_of_band(conn):
+    conn.send(len(recv_out_of_band(conn)["blob"]))
+
+def benchmark_large_buffers(sizes=(1 << 10, 1 << 20, 1 << 26)):
+    """
+    Memory and throughput for copying a payload of bytes + bytearray + array
+    of `size` bytes in total: deep_copy vs deep_copy_buffers, in-band
+    pickle vs out-of-band buffers, and sending it to a worker process.
+    For the 1 GB case: benchmark_large_buffers(sizes=(1 << 30,)) and ~4 GB RAM.
+    """
+    def payload(size):
+        return {"meta": {"size": size}, "blob": bytes(size // 2),
+                "frame": bytearray(size // 4), "samples": array("d", bytes(size // 4))}
+
+    def in_band(value):
+        return pickle.loads(pickle.dumps(value, protocol=5))
+
+    def out_of_band(value):
+        data, buffers = dumps_out_of_band(value)
+        return loads_out_of_band(data, buffers)
+
+    results = {}
+    for size in sizes:
+        value = payload(size)
+        for label, func in [
+            ("deep_copy", deep_copy),
+            ("deep_copy_buffers", deep_copy_buffers),
+            ("pickle in-band", in_band),
+            ("pickle out-of-band", out_of_band),
+        ]:
+            start = time.perf_counter()
+            func(value)
+            seconds = time.perf_counter() - start
+            _, peak = _peak_bytes(lambda: func(value))
+            results[size, label] = (seconds, peak)
+            print(f"{size:>12,} B  {label:<20} {size / seconds / 2**20:>12,.0f} MiB/s"
+                  f"  {peak / 2**20:>10.1f} MiB peak")
+
+        for label, send, receive in [
+            ("worker, in-band", lambda conn: conn.send(value), _ack_in_band),
+            ("worker, out-of-band", lambda conn: send_out_of_band(conn, value), _ack_out_of_band),
+        ]:
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=receive, args=(child,))
+            worker.start()
+            start = time.perf_counter()
+            send(parent)
+            parent.recv()
+            seconds = time.perf_counter() - start
+            worker.join()
+            results[size, label] = (seconds, None)
+            print(f"{size:>12,} B  {label:<20} {size / seconds / 2**20:>12,.0f} MiB/s")
+    return results
+
+def benchmark_copy_profiler(calls=200_000):
+    """
+    Per-call cost of the helpers with the profiler disabled vs calling the
+    copy directly, and with it enabled; then the report for a sample run.
+    """
+    small = [1, 2, 3]
+    payload = _request_payload(random.Random(3), items=5)
+
+    def per_call(func, value, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            func(value)
+        return (time.perf_counter() - start) / n * 1e9
+
+    results = {
+        "list.copy direct": per_call(list.copy, small, calls),
+        "shallow_copy_list (disabled)": per_call(shallow_copy_list, small, calls),
+        "copy.deepcopy direct": per_call(copy.deepcopy, payload, calls // 20),
+        "deep_copy (disabled)": per_call(deep_copy, payload, calls // 20),
+    }
+    with CopyProfiler() as profiler:
+        results["shallow_copy_list (enabled)"] = per_call(shallow_copy_list, small, calls // 20)
+        results["deep_copy (enabled)"] = per_call(deep_copy, payload, calls // 200)
+    for label, nanoseconds in results.items():
+        print(f"{label:<30} {nanoseconds:>10.0f}ns/call")
+    for stats in profiler.report(top=3):
+        print(stats)
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_deep_copy()
+    benchmark_copy_on_write()
+    benchmark_persistent()
+    benchmark_large_buffers()
+    benchmark_copy_profiler()
+
 # Run using:
 # pytest copy_behavior.py
@@ -5,6 +5,18 @@ Demonstrates Python dictionary methods and behaviors.
 Focus: access, mutation, inspection, conditions.
 """
 
+import os
+import pickle
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from itertools import filterfalse, repeat
+
 # ---------------------------
 # Access
 # ---------------------------
@@ -72,6 +84,464 @@ def is_dict_truthy(data):
     return bool(data)
 
 
+# ---------------------------
+# Bulk Operations
+# ---------------------------
+# One call per batch; the loops run inside map/zip/dict.update in C.
+
+def get_many(data, keys, default=None, as_dict=False):
+    keys = list(keys)  # may be an iterator; as_dict walks it twice
+    values = list(map(data.get, keys, repeat(default)))
+    if as_dict:
+        return dict(zip(keys, values))
+    return values
+
+def merge_many(data, dicts, on_conflict="last"):
+    """
+    Merge many dicts into data. on_conflict decides a key present in
+    both data and the incoming dict:
+      "last"   -> incoming value wins (same as repeated merge_dict)
+      "first"  -> existing value is kept
+      "error"  -> KeyError listing the conflicting keys, also between
+                  incoming dicts; every dict is checked before any is
+                  merged, so data is left unchanged
+      callable -> on_conflict(existing, incoming) gives the new value
+    """
+    if on_conflict == "error":
+        dicts = list(dicts)
+        seen = set()
+        conflicts = set()
+        for new_data in dicts:
+            conflicts |= data.keys() & new_data.keys()
+            conflicts |= seen & new_data.keys()
+            seen |= new_data.keys()
+        if conflicts:
+            raise KeyError(f"conflicting keys: {sorted(conflicts, key=repr)}")
+        on_conflict = "last"
+    if on_conflict == "last":
+        deque(map(data.update, dicts), maxlen=0)
+        return data
+    for new_data in dicts:
+        if on_conflict == "first":
+            fresh = list(filterfalse(data.__contains__, new_data))
+            data.update(zip(fresh, map(new_data.__getitem__, fresh)))
+        elif callable(on_conflict):
+            resolved = {key: on_conflict(data[key], new_data[key])
+                        for key in data.keys() & new_data.keys()}
+            data.update(new_data)
+            data.update(resolved)
+        else:
+            raise ValueError(f"unknown conflict policy: {on_conflict!r}")
+    return data
+
+def pop_many(data, keys, default=None):
+    return list(map(data.pop, keys, repeat(default)))
+
+
+# ---------------------------
+# Bounded Cache
+# ---------------------------
+
+_MISSING = object()
+
+
+def _entry_bytes(key, value):
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class BoundedCache(MutableMapping):
+    """
+    A dict-like cache that cannot grow without bound.
+
+    Works with get_value, get_value_with_default, set_default_value and
+    the other helpers above. Entries are evicted least-recently-used
+    first once max_entries or (approximately, via sys.getsizeof of key
+    and value) max_bytes is exceeded, and expire ttl seconds after they
+    were written. hits, misses, evictions and expirations are counted.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # key -> (value, expires_at, size), oldest use first
+        self._entries = OrderedDict()
+        # key -> expires_at, oldest write first (with a ttl only); every
+        # entry lives equally long, so this is also expiry order
+        self._expiry = OrderedDict()
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        if entry[1] is not None and entry[1] <= self.clock():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and (entry[1] is None or entry[1] > self.clock())
+
+    def setdefault(self, key, default=None):
+        value = self._lookup(key)
+        if value is _MISSING:
+            self[key] = value = default
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self._entries:
+            self._drop(key)
+        size = _entry_bytes(key, value) if self.max_bytes is not None else 0
+        expires_at = None if self.ttl is None else self.clock() + self.ttl
+        self._entries[key] = (value, expires_at, size)
+        if expires_at is not None:
+            self._expiry[key] = expires_at
+        self.bytes += size
+        self._enforce_limits()
+
+    def __delitem__(self, key):
+        self._drop(key)
+
+    def pop(self, key, default=_MISSING):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._expiry.pop(key, None)
+            self.bytes -= entry[2]
+            if entry[1] is None or entry[1] > self.clock():
+                return entry[0]
+        if default is _MISSING:
+            raise KeyError(key)
+        return default
+
+    def _drop(self, key):
+        self.bytes -= self._entries.pop(key)[2]
+        self._expiry.pop(key, None)
+
+    def _enforce_limits(self):
+        entries = self._entries
+        while ((self.max_entries is not None and len(entries) > self.max_entries)
+               or (self.max_bytes is not None and self.bytes > self.max_bytes and entries)):
+            key, (_, _, size) = entries.popitem(last=False)
+            self._expiry.pop(key, None)
+            self.bytes -= size
+            self.evictions += 1
+
+    def expire(self):
+        """
+        Drop every expired entry now instead of on next access. Walks the
+        entries in write order and stops at the first live one.
+        """
+        expiry = self._expiry
+        now = self.clock()
+        count = 0
+        while expiry:
+            key, expires_at = next(iter(expiry.items()))
+            if expires_at > now:
+                break
+            expiry.popitem(last=False)
+            self.bytes -= self._entries.pop(key)[2]
+            count += 1
+        self.expirations += count
+        return count
+
+    def __iter__(self):
+        self.expire()  # keys that __getitem__ would report missing
+        return iter(list(self._entries))
+
+    def __len__(self):
+        self.expire()
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self._expiry.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations, "entries": len(self), "bytes": self.bytes}
+
+
+_MIN_SHARD_BYTES = 1024
+
+
+class ThreadSafeCache(MutableMapping):
+    """
+    BoundedCache split into independently locked shards.
+
+    A key only ever takes its own shard's lock, so threads working on
+    different keys rarely wait on each other. Limits are divided evenly
+    across shards, which makes LRU order and the byte budget per shard
+    (approximately global). There are never more shards than max_entries,
+    so the total stays within it, and each shard gets at least
+    _MIN_SHARD_BYTES of max_bytes, so a small byte budget means fewer shards
+    rather than shards too small to hold an entry.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, shards=16,
+                 clock=time.monotonic):
+        if max_entries is not None:
+            shards = min(shards, max_entries)
+        if max_bytes is not None:
+            shards = min(shards, max_bytes // _MIN_SHARD_BYTES)
+        shards = max(shards, 1)
+        per_shard = lambda limit: None if limit is None else limit // shards
+        self._shards = [BoundedCache(per_shard(max_entries), per_shard(max_bytes), ttl, clock)
+                        for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def _shard(self, key):
+        index = hash(key) % len(self._shards)
+        return self._shards[index], self._locks[index]
+
+    def get(self, key, default=None):
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.get(key, default)
+
+    def __getitem__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            return shard[key]
+
+    def __contains__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            return key in shard
+
+    def setdefault(self, key, default=None):
+        shard, lock = self._shard(key)
+        with lock:
+            return shard.setdefault(key, default)
+
+    def __setitem__(self, key, value):
+        shard, lock = self._shard(key)
+        with lock:
+            shard[key] = value
+
+    def __delitem__(self, key):
+        shard, lock = self._shard(key)
+        with lock:
+            del shard[key]
+
+    def pop(self, key, default=_MISSING):
+        shard, lock = self._shard(key)
+        with lock:
+            if default is _MISSING:
+                return shard.pop(key)
+            return shard.pop(key, default)
+
+    def __iter__(self):
+        keys = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                keys.extend(shard)
+        return iter(keys)
+
+    def __len__(self):
+        total = 0
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                total += len(shard)
+        return total
+
+    def clear(self):
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
+
+    def stats(self):
+        totals = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                for name, count in shard.stats().items():
+                    totals[name] = totals.get(name, 0) + count
+        return totals
+
+
+# ---------------------------
+# Disk-Backed Dictionary
+# ---------------------------
+
+_DELETED = object()
+
+
+class SqliteDict(MutableMapping):
+    """
+    A persistent mapping stored in a sqlite3 file, for data larger than RAM.
+
+    - Keys must be str, float, bytes or an int that fits in 64 bits
+      (stored natively, so they compare like dict keys); values are
+      pickled.
+    - Writes are buffered and flushed batch_size at a time in one
+      transaction with executemany.
+    - Recently used values are kept pickled in a BoundedCache of
+      cache_entries in front of the file. Like shelve without writeback,
+      every read returns a fresh copy, and a value is snapshotted when it
+      is assigned: mutating a returned or assigned object changes nothing
+      stored. Assign it again to save the change.
+    - The file is in WAL mode. durable=True fsyncs every flushed batch
+      (synchronous=FULL). The default, synchronous=NORMAL, only fsyncs at
+      checkpoints: a power loss can drop the last batches but never
+      corrupts the file.
+
+    Call flush() or close() (or use it as a context manager) to make sure
+    buffered writes reach the file.
+    """
+
+    def __init__(self, path, cache_entries=10_000, batch_size=1000, durable=False):
+        self.path = path
+        self.batch_size = batch_size
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key PRIMARY KEY, value BLOB) WITHOUT ROWID"
+        )
+        self._cache = BoundedCache(max_entries=cache_entries)
+        self._pending = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    _KEY_TYPES = frozenset({str, int, float, bytes})
+    _INT_RANGE = range(-2**63, 2**63)  # sqlite INTEGER
+
+    @classmethod
+    def _storable(cls, key):
+        return type(key) in cls._KEY_TYPES and (type(key) is not int or key in cls._INT_RANGE)
+
+    @classmethod
+    def _check_key(cls, key):
+        if type(key) not in cls._KEY_TYPES:
+            raise TypeError(f"unsupported key type: {type(key).__name__}")
+        if type(key) is int and key not in cls._INT_RANGE:
+            raise OverflowError(f"int key does not fit in 64 bits: {key}")
+
+    def flush(self):
+        if not self._pending:
+            return
+        upserts = [(key, blob) for key, blob in self._pending.items() if blob is not _DELETED]
+        deletes = [(key,) for key, blob in self._pending.items() if blob is _DELETED]
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO kv VALUES (?, ?)", upserts)
+            self._connection.executemany("DELETE FROM kv WHERE key = ?", deletes)
+        self._pending.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+    def __getitem__(self, key):
+        if not self._storable(key):
+            raise KeyError(key)  # could never have been stored
+        blob = self._pending.get(key, _MISSING)
+        if blob is _DELETED:
+            raise KeyError(key)
+        if blob is _MISSING:
+            blob = self._cache.get(key, _MISSING)
+        if blob is _MISSING:
+            row = self._connection.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+            blob = self._cache[key] = row[0]
+        return pickle.loads(blob)
+
+    def __setitem__(self, key, value):
+        self._check_key(key)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._pending[key] = blob
+        self._cache[key] = blob
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._pending[key] = _DELETED
+        self._cache.pop(key, None)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def __contains__(self, key):
+        if not self._storable(key):
+            return False
+        value = self._pending.get(key, _MISSING)
+        if value is not _MISSING:
+            return value is not _DELETED
+        if key in self._cache:
+            return True
+        return self._connection.execute(
+            "SELECT 1 FROM kv WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+    def __iter__(self):
+        self.flush()
+        for (key,) in self._connection.execute("SELECT key FROM kv"):
+            yield key
+
+    def items(self):
+        """Stream (key, value) pairs straight from the file (no cache churn)."""
+        self.flush()
+        for key, blob in self._connection.execute("SELECT key, value FROM kv"):
+            yield key, pickle.loads(blob)
+
+    def values(self):
+        return (value for _, value in self.items())
+
+    def __len__(self):
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+    def clear(self):
+        self._pending.clear()
+        self._cache.clear()
+        with self._connection:
+            self._connection.execute("DELETE FROM kv")
+
+    def bulk_load(self, pairs):
+        """Insert many pairs in one transaction, evicting them from the cache."""
+        self.flush()
+        check_key = self._check_key
+        evict = self._cache.pop
+
+        def rows():
+            for key, value in pairs:
+                check_key(key)
+                evict(key, None)
+                yield key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO kv VALUES (?, ?)", rows())
+
+
 # ---------------------------
 # Pytest Tests
 # ---------------------------
@@ -114,5 +584,342 @@ def test_conditions():
     assert is_dict_truthy(d) is True
     assert is_dict_truthy({}) is False
 
+def test_get_many():
+    d = {"a": 1, "b": 2}
+    assert get_many(d, ["a", "x", "b"]) == [1, None, 2]
+    assert get_many(d, ["a", "x"], default=0) == [1, 0]
+    assert get_many(d, ["a", "x"], as_dict=True) == {"a": 1, "x": None}
+    assert get_many(d, iter([])) == []
+    assert get_many(d, iter(["a", "x"]), as_dict=True) == {"a": 1, "x": None}
+
+def test_merge_many_policies():
+    batches = [{"b": 20, "c": 3}, {"c": 30, "d": 4}]
+
+    last = {"a": 1, "b": 2}
+    for batch in batches:
+        merge_dict(last, batch)
+    assert merge_many({"a": 1, "b": 2}, batches) == last
+
+    first = merge_many({"a": 1, "b": 2}, batches, on_conflict="first")
+    assert first == {"a": 1, "b": 2, "c": 3, "d": 4}
+    assert list(first) == ["a", "b", "c", "d"]
+
+    summed = merge_many({"a": 1, "b": 2}, batches, on_conflict=lambda old, new: old + new)
+    assert summed == {"a": 1, "b": 22, "c": 33, "d": 4}
+
+    untouched = {"b": 2, "x": 0}
+    with pytest.raises(KeyError, match=r"\['b', 'c'\]"):  # "c" is in both batches
+        merge_many(untouched, iter(batches), on_conflict="error")
+    assert untouched == {"b": 2, "x": 0}
+    with pytest.raises(KeyError, match="'b'"):  # conflict between two batches
+        merge_many({}, [{"b": 1}, {"b": 2}], on_conflict="error")
+    assert merge_many({"a": 1}, batches[:1], on_conflict="error") == {"a": 1, "b": 20, "c": 3}
+    with pytest.raises(ValueError):
+        merge_many({}, batches, on_conflict="newest")
+
+def test_pop_many():
+    d = {"a": 1, "b": 2, "c": 3}
+    assert pop_many(d, ["a", "x", "c"]) == [1, None, 3]
+    assert d == {"b": 2}
+    assert pop_many(d, ["x"], default=0) == [0]
+
+def test_sqlite_dict_with_helpers(tmp_path):
+    path = tmp_path / "data.db"
+    with SqliteDict(path, cache_entries=2, batch_size=3) as d:
+        add_or_update(d, "a", [1, 2])
+        merge_dict(d, {"b": {"nested": True}, 3: "three"})
+        assert get_value(d, "a") == [1, 2]
+        assert get_value(d, "x") is None
+        assert get_value_with_default(d, "x", 0) == 0
+        assert set_default_value(d, "a", 100) == [1, 2]
+        assert set_default_value(d, "c", 200) == 200
+        assert remove_key(d, "b") == {"nested": True}
+        assert remove_key(d, "b") is None
+        assert has_key(d, 3) is True
+        assert dict_size(d) == 3
+        with pytest.raises(TypeError):
+            d[("tuple", "key")] = 1
+        assert get_value(d, ("t", 1)) is None
+        assert has_key(d, ("t", 1)) is False
+        assert remove_key(d, ("t", 1)) is None
+
+    with SqliteDict(path) as reopened:
+        assert dict(reopened.items()) == {"a": [1, 2], 3: "three", "c": 200}
+        assert set(get_keys(reopened)) == {"a", 3, "c"}
+        clear_dict(reopened)
+        assert is_dict_truthy(reopened) is False
+
+
+def test_sqlite_dict_random_operations_match_dict(tmp_path):
+    rng = random.Random(9)
+    plain = {}
+    with SqliteDict(tmp_path / "data.db", cache_entries=10, batch_size=7) as d:
+        for _ in range(2000):
+            key = rng.randrange(100)
+            if rng.random() < 0.3:
+                assert remove_key(d, key) == remove_key(plain, key)
+            elif rng.random() < 0.5:
+                assert get_value(d, key) == get_value(plain, key)
+            else:
+                d[key] = plain[key] = rng.random()
+        assert dict(d.items()) == plain
+        d.bulk_load((f"bulk{i}", i) for i in range(50))
+        assert len(d) == len(plain) + 50
+
+def test_sqlite_dict_rejects_unstorable_keys(tmp_path):
+    path = tmp_path / "data.db"
+    with SqliteDict(path, batch_size=3) as d:
+        d["a"] = 1
+        with pytest.raises(OverflowError):
+            d[2**70] = "big"
+        d["b"] = 2
+        d[-2**63] = d[2**63 - 1] = "edge"
+        assert get_value(d, 2**70) is None and has_key(d, -2**63 - 1) is False
+        with pytest.raises(TypeError):
+            d.bulk_load([("ok", 1), (("tuple", "key"), 2)])
+        assert "ok" not in d  # the failed load rolled back
+    with SqliteDict(path) as reopened:
+        assert dict(reopened.items()) == {"a": 1, "b": 2, -2**63: "edge", 2**63 - 1: "edge"}
+
+def test_sqlite_dict_reads_match_the_file(tmp_path):
+    path = tmp_path / "data.db"
+    with SqliteDict(path) as d:
+        d["a"] = 1
+        d.bulk_load([("a", 2)])
+        assert d["a"] == 2
+
+        values = [1]
+        d["l"] = values
+        values.append(2)
+        d.flush()
+        d["l"].append(3)
+        assert d["l"] == [1]
+    with SqliteDict(path) as reopened:
+        assert reopened["l"] == [1] and reopened["a"] == 2
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_bounded_cache_with_helpers():
+    cache = BoundedCache(max_entries=2)
+    add_or_update(cache, "a", 1)
+    add_or_update(cache, "b", 2)
+    assert get_value(cache, "a") == 1          # "a" is now most recent
+    assert set_default_value(cache, "c", 3) == 3  # evicts "b"
+    assert get_value(cache, "b") is None
+    assert get_value_with_default(cache, "b", 0) == 0
+    assert set_default_value(cache, "a", 100) == 1
+    assert set(get_keys(cache)) == {"a", "c"}
+    assert remove_key(cache, "a") == 1
+    assert dict_size(cache) == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.hits == 2 and cache.misses == 3
+
+
+def test_bounded_cache_ttl_and_bytes():
+    clock = FakeClock()
+    cache = BoundedCache(ttl=10, clock=clock)
+    cache["a"] = 1
+    clock.now = 5
+    cache["b"] = 2
+    clock.now = 10
+    assert has_key(cache, "a") is False
+    assert get_value(cache, "a") is None
+    assert cache.expirations == 1
+    clock.now = 20
+    assert cache.expire() == 1
+    assert is_dict_truthy(cache) is False
+
+def test_bounded_cache_expires_in_write_order():
+    clock = FakeClock()
+    cache = BoundedCache(ttl=10, clock=clock)
+    cache["a"] = 1
+    cache["b"] = 2
+    clock.now = 5
+    cache["a"] = 3             # rewritten: now expires after "b"
+    cache["c"] = 4
+    cache["b"]                 # a read does not extend the ttl
+    clock.now = 12
+    assert dict_size(cache) == 2 and cache.expirations == 1
+    assert remove_key(cache, "a") == 3
+    clock.now = 15
+    assert cache.expire() == 1 and len(cache) == 0
+
+def test_thread_safe_cache_small_limit():
+    cache = ThreadSafeCache(max_entries=4)
+    for i in range(100):
+        cache[i] = i
+    assert 0 < len(cache) <= 4
+    assert len(ThreadSafeCache(max_entries=0, shards=4)._shards) == 1
+
+    sized = ThreadSafeCache(max_bytes=1000)
+    sized["k"] = "v"
+    assert sized["k"] == "v"
+    assert len(sized._shards) == 1
+    assert len(ThreadSafeCache(max_bytes=_MIN_SHARD_BYTES * 4)._shards) == 4
+
+@pytest.mark.parametrize("cache_type", [BoundedCache, ThreadSafeCache])
+def test_expired_entries_are_not_listed(cache_type):
+    clock = FakeClock()
+    cache = cache_type(ttl=10, clock=clock)
+    cache["a"] = 1
+    clock.now = 5
+    cache["b"] = 2
+    clock.now = 12
+    assert dict_size(cache) == 1
+    assert get_keys(cache) == ["b"]
+    assert get_values(cache) == [2]
+    assert get_items(cache) == [("b", 2)]
+
+    entry = _entry_bytes("k0", "x" * 100)
+    sized = BoundedCache(max_bytes=entry * 3)
+    for i in range(10):
+        sized[f"k{i}"] = "x" * 100
+    assert len(sized) == 3 and sized.bytes <= entry * 3
+    assert list(sized) == ["k7", "k8", "k9"]
+    clear_dict(sized)
+    assert sized.bytes == 0
+
+
+def test_thread_safe_cache_under_threads():
+    cache = ThreadSafeCache(max_entries=1600, shards=8)
+
+    def worker(offset):
+        for i in range(2000):
+            key = (offset * 7 + i) % 1000
+            set_default_value(cache, key, key)
+            assert get_value_with_default(cache, key, key) == key
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 2000 * 2
+    assert len(cache) <= 1600
+    assert all(get_value(cache, key) in (key, None) for key in range(1000))
+
+
+# ---------------------------
+# Benchmarks
+# ---------------------------
+
+def _per_op(func, keys):
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+
+def benchmark_bounded_cache(size=100_000, operations=1_000_000):
+    """
+    Nanoseconds per get (hit and miss) and set: plain dict vs caches.
+    """
+    keys = [i % size for i in range(operations)]
+    missing = [size + i for i in range(operations)]
+    targets = {
+        "dict": {},
+        "BoundedCache": BoundedCache(max_entries=size),
+        "BoundedCache+ttl": BoundedCache(max_entries=size, ttl=3600),
+        "ThreadSafeCache": ThreadSafeCache(max_entries=size * 2),
+    }
+    results = {}
+    for label, target in targets.items():
+        set_ns = _per_op(lambda key: add_or_update(target, key, key), keys)
+        hit_ns = _per_op(lambda key: get_value(target, key), keys)
+        miss_ns = _per_op(lambda key: get_value(target, key), missing)
+        results[label] = (set_ns, hit_ns, miss_ns)
+        print(f"{label:<18} set {set_ns:>7.0f}ns  hit {hit_ns:>7.0f}ns  miss {miss_ns:>7.0f}ns")
+    return results
+
+
+def benchmark_bulk_operations(batch_sizes=(10, 100, 1_000, 10_000), total=1_000_000):
+    """
+    Speedup of each bulk helper over a loop of single-key calls.
+    """
+    results = {}
+    for batch_size in batch_sizes:
+        rounds = max(total // batch_size, 1)
+        keys = [f"key{i}" for i in range(batch_size)]
+        source = dict.fromkeys(keys, 1)
+        small_dicts = [{key: i} for i, key in enumerate(keys)]
+
+        def timed(func):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                func()
+            return time.perf_counter() - start
+
+        def merge_loop():
+            merged = {}
+            for d in small_dicts:
+                merge_dict(merged, d)
+
+        def pop_loop():
+            copy = dict(source)
+            return [remove_key(copy, key) for key in keys]
+
+        cases = {
+            "get": (lambda: [get_value(source, key) for key in keys],
+                    lambda: get_many(source, keys)),
+            "merge": (merge_loop, lambda: merge_many({}, small_dicts)),
+            "pop": (pop_loop, lambda: pop_many(dict(source), keys)),
+        }
+        for name, (loop, bulk) in cases.items():
+            loop_seconds = timed(loop)
+            bulk_seconds = timed(bulk)
+            results[(name, batch_size)] = loop_seconds / bulk_seconds
+            print(f"{name:<6} batch={batch_size:<7} loop {loop_seconds:>7.3f}s  "
+                  f"bulk {bulk_seconds:>7.3f}s  x{loop_seconds / bulk_seconds:.1f}")
+    return results
+
+
+def benchmark_sqlite_dict(size=1_000_000, reads=100_000, value_bytes=100):
+    """
+    Bulk load, random reads (cold and hot-cache) and a full scan.
+    Run with size large enough that the file exceeds RAM to measure the
+    out-of-core case; the default stays laptop-sized.
+    """
+    payload = "x" * value_bytes
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        with SqliteDict(path, cache_entries=10_000, batch_size=10_000) as d:
+            start = time.perf_counter()
+            d.bulk_load((f"key{i}", payload) for i in range(size))
+            results["bulk_load"] = size / (time.perf_counter() - start)
+
+            rng = random.Random(0)
+            cold = [f"key{rng.randrange(size)}" for _ in range(reads)]
+            hot = [f"key{rng.randrange(5_000)}" for _ in range(reads)]
+            for label, keys in [("random_read", cold), ("hot_read", hot)]:
+                start = time.perf_counter()
+                for key in keys:
+                    d[key]
+                results[label] = reads / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            count = sum(1 for _ in d.items())
+            results["scan"] = count / (time.perf_counter() - start)
+        results["file_mib"] = os.path.getsize(path) / 2**20
+
+    for label, rate in results.items():
+        unit = "MiB" if label == "file_mib" else "ops/sec"
+        print(f"{label:<12} {rate:>14,.1f} {unit}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_bounded_cache()
+    benchmark_sqlite_dict()
+    benchmark_bulk_operations()
+
 # Run using:
 # pytest dict_methods.py
@@ -5,16 +5,32 @@ Focused examples of filtering and functional-style operations
 (map, filter, reduce, any, all) applied to dictionaries.
 """
 
-from functools import reduce
+import heapq
+import operator
+import os
+import random
+import sys
+import time
+import tracemalloc
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, reduce
+from itertools import accumulate, compress
+from operator import itemgetter, methodcaller
 
 # =========================
 # Logic Section
 # =========================
 
-def filter_by_value_greater_than(data, threshold):
+def filter_by_value_greater_than(data, threshold, workers=1):
     """
     Keep items where value > threshold.
     """
+    if isinstance(data, ValueIndexedDict):
+        return data.greater_than(threshold)
+    if workers != 1:
+        return parallel_filter(data, partial(operator.lt, threshold), workers=workers)
     return {
         k: v
         for k, v in data.items()
@@ -22,10 +38,15 @@ def filter_by_value_greater_than(data, threshold):
     }
 
 
-def filter_by_key_startswith(data, prefix):
+def filter_by_key_startswith(data, prefix, workers=1):
     """
     Keep items where key starts with a given prefix.
     """
+    if isinstance(data, KeyIndexedDict):
+        return data.with_prefix(prefix)
+    if workers != 1:
+        return parallel_filter(data, methodcaller("startswith", prefix), by="key",
+                               workers=workers)
     return {
         k: v
         for k, v in data.items()
@@ -33,20 +54,32 @@ def filter_by_key_startswith(data, prefix):
     }
 
 
-def map_values_double(data):
+def _double(value):
+    return value * 2
+
+
+def _double_if_even(value):
+    return value * 2 if value % 2 == 0 else value
+
+
+def map_values_double(data, workers=1):
     """
     Transform values by doubling them.
     """
+    if workers != 1:
+        return parallel_map_values(data, _double, workers=workers)
     return {
         k: v * 2
         for k, v in data.items()
     }
 
 
-def map_values_conditionally(data):
+def map_values_conditionally(data, workers=1):
     """
     Double values only if they are even.
     """
+    if workers != 1:
+        return parallel_map_values(data, _double_if_even, workers=workers)
     return {
         k: (v * 2 if v % 2 == 0 else v)
         for k, v in data.items()
@@ -57,6 +90,8 @@ def reduce_sum_of_values(data):
     """
     Reduce dictionary values into a single sum.
     """
+    if isinstance(data, AggregateDict):
+        return data.total
     return reduce(lambda a, b: a + b, data.values(), 0)
 
 
@@ -64,6 +99,8 @@ def any_value_above_threshold(data, threshold):
     """
     Check if ANY value satisfies the condition.
     """
+    if isinstance(data, AggregateDict):
+        return bool(data) and data.max_value() > threshold
     return any(v > threshold for v in data.values())
 
 
@@ -71,6 +108,8 @@ def all_values_positive(data):
     """
     Check if ALL values are positive.
     """
+    if isinstance(data, AggregateDict):
+        return data.non_positive == 0
     return all(v > 0 for v in data.values())
 
 
@@ -92,6 +131,8 @@ def filter_nested_dictionary(data, threshold):
 
 def find_max_value_key(data):
     """Return key with maximum value."""
+    if isinstance(data, (ValueIndexedDict, AggregateDict)):
+        return data.max_value_key()
     if not data:
         return None
     return max(data, key=data.get)
@@ -118,10 +159,814 @@ def flatten_nested_dictionary(nested_data):
             result[f"{parent_key}.{child_key}"] = value
     return result
 
+# =========================
+# Sharded Parallel Map / Filter
+# =========================
+
+# Below this much estimated serial work, starting a pool and pickling
+# shards costs more than it saves (measured with benchmark_parallel).
+PARALLEL_MIN_SECONDS = 0.25
+PARALLEL_SAMPLE_SIZE = 1000
+SHARDS_PER_WORKER = 4
+
+
+def _estimated_serial_seconds(func, items):
+    """
+    Time func on a small sample and extrapolate to all items.
+    """
+    sample = items[:PARALLEL_SAMPLE_SIZE]
+    if not sample:
+        return 0.0
+    start = time.perf_counter()
+    for item in sample:
+        func(item)
+    return (time.perf_counter() - start) / len(sample) * len(items)
+
+
+def _map_shard(func, shard):
+    """
+    Worker: one list in, one list out.
+    """
+    return list(map(func, shard))
+
+
+def _sharded_map(func, items, workers, min_parallel_seconds):
+    """
+    list(map(func, items)), on a process pool when it is worth it.
+    Items travel as one list per shard (one pickle each way), not one
+    task per item.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or not items or _estimated_serial_seconds(func, items) < min_parallel_seconds:
+        return list(map(func, items))
+
+    shard_size = -(-len(items) // (workers * SHARDS_PER_WORKER))
+    shards = [items[start:start + shard_size] for start in range(0, len(items), shard_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = []
+        for shard in pool.map(partial(_map_shard, func), shards):
+            results.extend(shard)
+    return results
+
+
+def parallel_map_values(data, func, workers=None, min_parallel_seconds=PARALLEL_MIN_SECONDS):
+    """
+    {k: func(v)} computed on key shards across a process pool.
+
+    Only the values are shipped; keys stay here and are zipped back in
+    the original order, so the result equals the serial comprehension.
+    func must be picklable (a module-level function or a partial of one).
+    Inputs whose estimated serial time is under min_parallel_seconds, or
+    workers=1, run serially.
+    """
+    keys = list(data)
+    values = _sharded_map(func, list(data.values()), workers, min_parallel_seconds)
+    return dict(zip(keys, values))
+
+
+def parallel_filter(data, predicate, by="value", workers=None,
+                    min_parallel_seconds=PARALLEL_MIN_SECONDS):
+    """
+    {k: v for k, v in data.items() if predicate(v)} (or predicate(k) with
+    by="key") on a process pool. Workers send back one flag per item.
+    """
+    if by not in ("value", "key"):
+        raise ValueError(f"by must be 'value' or 'key', not {by!r}")
+    tested = list(data.values()) if by == "value" else list(data)
+    flags = _sharded_map(predicate, tested, workers, min_parallel_seconds)
+    return dict(compress(data.items(), flags))
+
+
+# =========================
+# Deep Flatten / Unflatten
+# =========================
+
+def iter_flatten(nested, sep=".", tuple_paths=False, intern=False):
+    """
+    Stream (path, value) for every leaf of an arbitrarily deep dict.
+
+    Uses an explicit stack instead of recursion, so depth is only bounded
+    by memory. Paths are "a.b.c" strings (keys joined with sep) or, with
+    tuple_paths=True, ("a", "b", "c") tuples. A node's path prefix is
+    built once, on its first leaf, and shared by all of its leaves.
+
+    intern=True interns repeated path segments: every str key of a tuple
+    path goes through sys.intern, so the tuples of many records with the
+    same shape share one object per segment; string paths, being freshly
+    joined, are interned whole. Slower per leaf, it pays off when the paths
+    are kept (e.g. as keys of many flattened rows). Empty dicts are
+    yielded as leaves so unflatten can restore them. String paths turn
+    non-str keys into strings, so {1: {2: 3}} round-trips through
+    unflatten as {'1': {'2': 3}}; use tuple_paths=True to keep key types.
+    """
+    intern_segments = intern and tuple_paths
+    keys = []  # keys from the root down to the node on top of the stack
+    stack = [[iter(nested.items()), () if tuple_paths else ""]]
+    while stack:
+        frame = stack[-1]
+        for key, value in frame[0]:
+            if intern_segments and type(key) is str:
+                key = sys.intern(key)
+            if isinstance(value, dict) and value:
+                keys.append(key)
+                stack.append([iter(value.items()), None])
+                break
+            prefix = frame[1]
+            if prefix is None:
+                prefix = frame[1] = (
+                    tuple(keys) if tuple_paths else sep.join(map(str, keys)) + sep
+                )
+            if tuple_paths:
+                yield prefix + (key,), value
+            else:
+                path = f"{prefix}{key}"
+                yield (sys.intern(path) if intern else path), value
+        else:
+            stack.pop()
+            if stack:
+                keys.pop()
+
+
+def flatten_deep(nested, sep=".", tuple_paths=False):
+    """
+    Eager counterpart of iter_flatten; matches flatten_nested_dictionary
+    on one-level input.
+    """
+    return dict(iter_flatten(nested, sep, tuple_paths))
+
+
+def unflatten(flat, sep="."):
+    """
+    Rebuild a nested dict from {path: value} or (path, value) pairs.
+    String paths are split on sep; tuple paths are used as is. A path
+    that runs through an existing leaf raises ValueError.
+    """
+    pairs = flat.items() if isinstance(flat, dict) else flat
+    result = {}
+    for path, value in pairs:
+        parts = path.split(sep) if isinstance(path, str) else path
+        node = result
+        for depth, part in enumerate(parts[:-1], 1):
+            child = node.setdefault(part, {})
+            if not isinstance(child, dict):
+                leaf = sep.join(parts[:depth]) if isinstance(path, str) else tuple(parts[:depth])
+                raise ValueError(f"path {path!r} runs through the leaf at {leaf!r}")
+            node = child
+        node[parts[-1]] = value
+    return result
+
+
+def count_leaves(nested):
+    """
+    Count leaf values at any depth (count_nested_keys stops at level two).
+    """
+    return sum(1 for _ in iter_flatten(nested, tuple_paths=True))
+
+
+# =========================
+# Lazy Queries
+# =========================
+
+def _apply_ops(items, ops):
+    """
+    Run every recorded operation on each (key, value) pair in one loop.
+    ops holds (is_map, on_key, func) triples.
+    """
+    for key, value in items:
+        for is_map, on_key, func in ops:
+            if is_map:
+                value = func(value)
+            elif not func(key if on_key else value):
+                break
+        else:
+            yield key, value
+
+
+class Q:
+    """
+    Lazy query over a dict: Q(data).where(...).map_values(...).sum()
+
+    where / where_key / map_values only record an operation and return a
+    new Q; nothing runs until a terminal method (to_dict, sum, count,
+    any, all, max_key, items) is called. The terminal then makes one pass
+    over data with no intermediate dicts. When no operation looks at keys
+    and the terminal only needs values, that pass is a chain of the C
+    builtins filter/map over data.values().
+    """
+
+    def __init__(self, data, ops=()):
+        self._data = data
+        self._ops = ops
+
+    def _then(self, kind, func):
+        return Q(self._data, self._ops + ((kind, func),))
+
+    def where(self, predicate):
+        """Keep items whose value satisfies predicate."""
+        return self._then("where", predicate)
+
+    def where_key(self, predicate):
+        """Keep items whose key satisfies predicate."""
+        return self._then("where_key", predicate)
+
+    def map_values(self, func):
+        """Replace each value with func(value)."""
+        return self._then("map_values", func)
+
+    def items(self):
+        """Iterator over the resulting (key, value) pairs."""
+        if not self._ops:
+            return iter(self._data.items())
+        ops = [(kind == "map_values", kind == "where_key", func) for kind, func in self._ops]
+        return _apply_ops(self._data.items(), ops)
+
+    def values(self):
+        """Iterator over the resulting values."""
+        if any(kind == "where_key" for kind, _ in self._ops):
+            return map(itemgetter(1), self.items())
+        values = self._data.values()
+        for kind, func in self._ops:
+            values = filter(func, values) if kind == "where" else map(func, values)
+        return iter(values)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def sum(self, start=0):
+        return sum(self.values(), start)
+
+    def count(self):
+        return sum(1 for _ in self.values())
+
+    def any(self, predicate=bool):
+        return any(map(predicate, self.values()))
+
+    def all(self, predicate=bool):
+        return all(map(predicate, self.values()))
+
+    def max_key(self):
+        """Key of the first largest value, or None when nothing is left."""
+        best = max(self.items(), key=itemgetter(1), default=None)
+        return None if best is None else best[0]
+
+
+# =========================
+# Indexed Dictionaries
+# =========================
+
+_AFTER_TICKS = float("inf")
+
+
+class _SortedIndex:
+    """
+    Values kept in sorted order next to the keys that hold them.
+
+    Entries are ordered by (value, insertion number): equal values stay
+    in the order they were added, and add/remove find their exact slot
+    with bisect even when a value repeats many times, without ever
+    comparing keys. As in sortedcontainers.SortedList, the entries live in
+    chunks of about _LOAD, so a write shifts one short list instead of the
+    whole tail. Each key's (value, insertion number) is kept too, so
+    remove(key) needs no value from the caller and get(key) returns what
+    the index holds. Range lookups bisect the chunk maxima, then one chunk;
+    positions are global, counted with a prefix sum of chunk lengths that
+    is rebuilt on the first lookup after a write (O(n / _LOAD)).
+    """
+
+    _LOAD = 1000
+
+    def __init__(self, pairs=()):
+        pairs = sorted(pairs, key=itemgetter(1))
+        load = self._LOAD
+        starts = range(0, len(pairs), load)
+        self._keys = [[key for key, _ in pairs[i:i + load]] for i in starts]
+        self._values = [[value for _, value in pairs[i:i + load]] for i in starts]
+        self._ticks = [list(range(i, min(i + load, len(pairs)))) for i in starts]
+        self._maxes = [(values[-1], ticks[-1]) for values, ticks in zip(self._values, self._ticks)]
+        self._entry_of = {key: (value, tick) for tick, (key, value) in enumerate(pairs)}
+        self._clock = self._len = len(pairs)
+        self._offsets = None
+
+    def __len__(self):
+        return self._len
+
+    def _chunk(self, value, tick):
+        # First chunk whose largest entry is not below (value, tick).
+        return min(bisect_left(self._maxes, (value, tick)), len(self._maxes) - 1)
+
+    @staticmethod
+    def _position(values, ticks, tick, value):
+        low = bisect_left(values, value)
+        high = bisect_right(values, value, low)
+        return bisect_left(ticks, tick, low, high)
+
+    def __contains__(self, key):
+        return key in self._entry_of
+
+    def get(self, key, default=None):
+        """The value indexed for key, or default."""
+        entry = self._entry_of.get(key)
+        return default if entry is None else entry[0]
+
+    def add(self, key, value):
+        if key in self._entry_of:
+            raise KeyError(f"already indexed: {key!r}")
+        tick = self._clock
+        self._entry_of[key] = (value, tick)
+        self._clock += 1
+        self._len += 1
+        self._offsets = None
+        if not self._maxes:
+            self._keys.append([key])
+            self._values.append([value])
+            self._ticks.append([tick])
+            self._maxes.append((value, tick))
+            return
+        i = self._chunk(value, tick)
+        values, ticks = self._values[i], self._ticks[i]
+        position = self._position(values, ticks, tick, value)
+        values.insert(position, value)
+        self._keys[i].insert(position, key)
+        ticks.insert(position, tick)
+        if position == len(values) - 1:
+            self._maxes[i] = (value, tick)
+        if len(values) > 2 * self._LOAD:
+            self._split(i)
+
+    def remove(self, key):
+        value, tick = self._entry_of.pop(key)
+        i = self._chunk(value, tick)
+        values, ticks = self._values[i], self._ticks[i]
+        position = self._position(values, ticks, tick, value)
+        del values[position]
+        del self._keys[i][position]
+        del ticks[position]
+        self._len -= 1
+        self._offsets = None
+        if len(values) < self._LOAD // 2 and len(self._maxes) > 1:
+            self._merge(i)
+        elif not values:
+            self.clear()
+        elif position == len(values):
+            self._maxes[i] = (values[-1], ticks[-1])
+
+    def _split(self, i):
+        half = self._LOAD
+        for chunks in (self._keys, self._values, self._ticks):
+            chunk = chunks[i]
+            chunks.insert(i + 1, chunk[half:])
+            del chunk[half:]
+        self._maxes.insert(i, (self._values[i][-1], self._ticks[i][-1]))
+
+    def _merge(self, i):
+        """Fold a short chunk i into a neighbour."""
+        i = min(i, len(self._maxes) - 2)
+        for chunks in (self._keys, self._values, self._ticks):
+            chunks[i] += chunks.pop(i + 1)
+        del self._maxes[i + 1]
+        self._maxes[i] = (self._values[i][-1], self._ticks[i][-1])
+        if len(self._values[i]) > 2 * self._LOAD:
+            self._split(i)
+
+    def clear(self):
+        self._keys.clear()
+        self._values.clear()
+        self._ticks.clear()
+        self._maxes.clear()
+        self._entry_of.clear()
+        self._len = 0
+        self._offsets = None
+
+    def _chunk_offsets(self):
+        if self._offsets is None:
+            self._offsets = list(accumulate(map(len, self._values), initial=0))
+        return self._offsets
+
+    def _bisect(self, value, right):
+        """Global bisect_left (or bisect_right) of value over all entries."""
+        # (value,) sorts before every (value, tick); (value, inf) after them.
+        i = bisect_left(self._maxes, (value, _AFTER_TICKS) if right else (value,))
+        if i == len(self._maxes):
+            return self._len
+        inner = (bisect_right if right else bisect_left)(self._values[i], value)
+        return self._chunk_offsets()[i] + inner
+
+    def bounds(self, op, value):
+        """Slice (start, stop) of entries whose value satisfies `op value`."""
+        if op == ">":
+            return self._bisect(value, True), self._len
+        if op == ">=":
+            return self._bisect(value, False), self._len
+        if op == "<":
+            return 0, self._bisect(value, False)
+        if op == "<=":
+            return 0, self._bisect(value, True)
+        if op == "==":
+            return self._bisect(value, False), self._bisect(value, True)
+        raise ValueError(f"unknown operator: {op!r}")
+
+    def _slice(self, chunks, start, stop):
+        offsets = self._chunk_offsets()
+        i = bisect_right(offsets, start) - 1
+        result = []
+        while start < stop:
+            chunk = chunks[i]
+            end = min(stop - offsets[i], len(chunk))
+            result += chunk[start - offsets[i]:end]
+            start = offsets[i] + end
+            i += 1
+        return result
+
+    def keys(self, start=0, stop=None):
+        """Keys at positions start..stop, in value order."""
+        return self._slice(self._keys, start, self._len if stop is None else stop)
+
+    def values(self, start=0, stop=None):
+        """Values at positions start..stop, in sorted order."""
+        return self._slice(self._values, start, self._len if stop is None else stop)
+
+    def max_value(self):
+        return self._values[-1][-1]
+
+    def first_max_key(self):
+        """Key of the earliest-added largest value, without global offsets."""
+        value = self.max_value()
+        i = bisect_left(self._maxes, (value,))  # chunk where the max run starts
+        return self._keys[i][bisect_left(self._values[i], value)]
+
+
+class ValueIndexedDict(MutableMapping):
+    """
+    A dict that also keeps its values sorted, for repeated range queries.
+
+    A _SortedIndex holds the values in sorted order with their keys;
+    every insert, update and delete moves one entry with bisect, so
+    greater_than / between cost O(log n + k) instead of a full scan.
+    Results come back in value order rather than insertion order.
+    Values must be mutually comparable.
+    """
+
+    def __init__(self, data=()):
+        self._data = dict(data)
+        self._index = _SortedIndex(self._data.items())
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._index.remove(key)
+        self._data[key] = value
+        self._index.add(key, value)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._index.remove(key)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"ValueIndexedDict({self._data!r})"
+
+    def clear(self):
+        self._data.clear()
+        self._index.clear()
+
+    def _slice(self, start, stop):
+        return dict(zip(self._index.keys(start, stop), self._index.values(start, stop)))
+
+    def greater_than(self, threshold):
+        """Items with value > threshold."""
+        return self._slice(*self._index.bounds(">", threshold))
+
+    def between(self, low, high):
+        """Items with low <= value <= high."""
+        start, _ = self._index.bounds(">=", low)
+        _, stop = self._index.bounds("<=", high)
+        return self._slice(start, stop)
+
+    def max_value_key(self):
+        """Key of the largest value (the earliest added on ties), or None."""
+        if not self._index:
+            return None
+        return self._index.first_max_key()
+
+
+_MISSING = object()
+
+
+class RecordStore(MutableMapping):
+    """
+    Records keyed by id (the dict-of-dicts shape filter_nested_dictionary
+    takes) with sorted secondary indexes on chosen fields.
+
+        store = RecordStore(users, indexes=("score", "region"), defaults={"score": 0})
+        store.query(score=(">", 50), region="eu")
+
+    Each query condition is `field=value` (equality) or
+    `field=(op, value)` with op one of > >= < <= ==. Each indexed
+    condition is sized with bisect; the ids of the most selective one are
+    the candidates, and every other condition (indexed or not) is checked
+    by comparing the candidate record's field.
+
+    A record missing an indexed field uses defaults[field] if given, and
+    is left out of that index otherwise. Change records through
+    store[id] = record or update_record(). A record mutated in place is
+    not re-indexed until it is assigned again (store[id] = record); the
+    indexes remember the values they hold, so that assignment updates them.
+    """
+
+    def __init__(self, data=(), indexes=(), defaults=None):
+        self._data = dict(data)
+        self.defaults = dict(defaults or {})
+        self._indexes = {
+            field: _SortedIndex(
+                (record_id, value) for record_id, record in self._data.items()
+                if (value := self._field(record, field)) is not _MISSING
+            )
+            for field in indexes
+        }
+
+    def _field(self, record, field):
+        return record.get(field, self.defaults.get(field, _MISSING))
+
+    def __getitem__(self, record_id):
+        return self._data[record_id]
+
+    def __setitem__(self, record_id, record):
+        # Diff against what each index holds, not the stored record: the
+        # caller may have mutated that very object before assigning it.
+        for field, index in self._indexes.items():
+            old_value = index.get(record_id, _MISSING)
+            new_value = self._field(record, field)
+            if old_value is new_value or (
+                    old_value is not _MISSING and new_value is not _MISSING
+                    and old_value == new_value):
+                continue
+            if old_value is not _MISSING:
+                index.remove(record_id)
+            if new_value is not _MISSING:
+                index.add(record_id, new_value)
+        self._data[record_id] = record
+
+    def __delitem__(self, record_id):
+        del self._data[record_id]
+        for index in self._indexes.values():
+            if record_id in index:
+                index.remove(record_id)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"RecordStore({self._data!r}, indexes={list(self._indexes)!r})"
+
+    def clear(self):
+        self._data.clear()
+        for index in self._indexes.values():
+            index.clear()
+
+    def update_record(self, record_id, **fields):
+        """Change some fields of one record, keeping the indexes current."""
+        self[record_id] = {**self._data[record_id], **fields}
+
+    def query(self, **conditions):
+        """Return {id: record} for the records matching every condition."""
+        parsed = [
+            (field, *(condition if isinstance(condition, tuple) else ("==", condition)))
+            for field, condition in conditions.items()
+        ]
+
+        # Two bisects per indexed condition tell how many ids each one
+        # selects; only the most selective is sliced out of its index.
+        best = None
+        for position, (field, op, value) in enumerate(parsed):
+            index = self._indexes.get(field)
+            if index is not None:
+                start, stop = index.bounds(op, value)
+                if best is None or stop - start < best[1] - best[0]:
+                    best = (start, stop, position, index)
+
+        if best is None:
+            candidates = self._data
+            checks = parsed
+        else:
+            start, stop, position, index = best
+            candidates = index.keys(start, stop)
+            checks = parsed[:position] + parsed[position + 1:]
+        checks = [(field, _operator(op), value, self.defaults.get(field, _MISSING))
+                  for field, op, value in checks]
+
+        data = self._data
+        result = {}
+        for record_id in candidates:
+            record = data[record_id]
+            for field, compare, value, default in checks:
+                actual = record.get(field, default)
+                if actual is _MISSING or not compare(actual, value):
+                    break
+            else:
+                result[record_id] = record
+        return result
+
+
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt,
+              "<=": operator.le, "==": operator.eq}
+
+
+def _operator(op):
+    try:
+        return _OPERATORS[op]
+    except KeyError:
+        raise ValueError(f"unknown operator: {op!r}") from None
+
+
+class AggregateDict(MutableMapping):
+    """
+    A dict of numbers that keeps running aggregates as it is mutated.
+
+    - total, len:       updated on every write, O(1) to read
+    - non_positive:     how many values are <= 0 (all_values_positive)
+    - max_value(_key):  a max-heap with lazy deletion; overwritten or
+                        deleted entries are dropped when they surface,
+                        so reads are amortized O(log n)
+
+    total is maintained by adding and subtracting, so with float values
+    it can drift from a fresh sum by rounding error; int values are exact.
+    On ties max_value_key returns the key that was written first.
+    """
+
+    def __init__(self, data=()):
+        self._data = {}
+        self._versions = {}
+        self._heap = []
+        self._clock = 0
+        self.total = 0
+        self.non_positive = 0
+        for key, value in dict(data).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._forget(self._data[key])
+        self._data[key] = value
+        self.total += value
+        if value <= 0:
+            self.non_positive += 1
+        self._clock += 1
+        self._versions[key] = self._clock
+        heapq.heappush(self._heap, (-value, self._clock, key))
+        self._maybe_compact()
+
+    def __delitem__(self, key):
+        value = self._data.pop(key)
+        del self._versions[key]
+        self._forget(value)
+        self._maybe_compact()
+
+    def _forget(self, value):
+        self.total -= value
+        if value <= 0:
+            self.non_positive -= 1
+
+    def _maybe_compact(self):
+        """Rebuild the heap once stale entries outnumber live ones."""
+        if len(self._heap) > 2 * len(self._data) + 64:
+            self._compact()
+
+    def _compact(self):
+        versions = self._versions
+        self._heap = [entry for entry in self._heap if versions.get(entry[2]) == entry[1]]
+        heapq.heapify(self._heap)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"AggregateDict({self._data!r})"
+
+    def clear(self):
+        self._data.clear()
+        self._versions.clear()
+        self._heap.clear()
+        self.total = 0
+        self.non_positive = 0
+
+    def _top(self):
+        heap = self._heap
+        versions = self._versions
+        while heap:
+            _, version, key = heap[0]
+            if versions.get(key) == version:
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def max_value(self):
+        """Largest value, or None when empty."""
+        top = self._top()
+        return None if top is None else -top[0]
+
+    def max_value_key(self):
+        """Key of the largest value, or None when empty."""
+        top = self._top()
+        return None if top is None else top[2]
+
+
+def _prefix_successor(prefix):
+    """
+    Smallest string greater than every string starting with prefix,
+    or None when no such string exists (e.g. an empty prefix).
+    """
+    while prefix:
+        last = ord(prefix[-1])
+        if last < sys.maxunicode:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+
+class KeyIndexedDict(MutableMapping):
+    """
+    A dict with string keys that also keeps its keys sorted.
+
+    All keys sharing a prefix sit next to each other in the sorted list,
+    so with_prefix() finds the block with two bisects and copies it:
+    O(log n + k) per query instead of a startswith() on every key.
+    Inserting a new key or deleting one shifts the list (a memmove);
+    updating an existing key's value does not touch the index.
+    """
+
+    def __init__(self, data=()):
+        self._data = dict(data)
+        self._keys = sorted(self._data)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._data:
+            self._keys.insert(bisect_left(self._keys, key), key)
+        self._data[key] = value
+
+    def __delitem__(self, key):
+        del self._data[key]
+        del self._keys[bisect_left(self._keys, key)]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"KeyIndexedDict({self._data!r})"
+
+    def clear(self):
+        self._data.clear()
+        self._keys.clear()
+
+    def prefix_range(self, prefix):
+        """Slice bounds of the keys starting with prefix."""
+        start = bisect_left(self._keys, prefix)
+        successor = _prefix_successor(prefix)
+        stop = len(self._keys) if successor is None else bisect_left(self._keys, successor, start)
+        return start, stop
+
+    def with_prefix(self, prefix):
+        """Items whose key starts with prefix, in key order."""
+        start, stop = self.prefix_range(prefix)
+        data = self._data
+        return {key: data[key] for key in self._keys[start:stop]}
+
+    def count_prefix(self, prefix):
+        start, stop = self.prefix_range(prefix)
+        return stop - start
+
+    def index_bytes(self):
+        """Memory used by the index itself (keys are shared with the dict)."""
+        return sys.getsizeof(self._keys)
+
+
 # =========================
 # Pytest Test Section
 # =========================
 
+import pytest
+
 def test_filter_by_value_greater_than():
     data = {"a": 10, "b": 5, "c": 20}
     assert filter_by_value_greater_than(data, 9) == {"a": 10, "c": 20}
@@ -199,4 +1044,628 @@ def test_flatten_nested_dictionary():
         "user.name": "Raj",
         "meta.active": True
     }
-    assert flatten_nested_dictionary(data) == result
\ No newline at end of file
+    assert flatten_nested_dictionary(data) == result
+
+
+def test_value_indexed_dict_matches_helpers():
+    rng = random.Random(3)
+    plain = {}
+    indexed = ValueIndexedDict()
+    for step in range(2000):
+        key = f"k{rng.randrange(300)}"
+        if rng.random() < 0.2 and key in plain:
+            del plain[key]
+            del indexed[key]
+        else:
+            plain[key] = indexed[key] = rng.randrange(100)
+
+        if step % 50 == 0:
+            threshold = rng.randrange(-10, 110)
+            assert filter_by_value_greater_than(indexed, threshold) == \
+                filter_by_value_greater_than(plain, threshold)
+            assert plain[find_max_value_key(indexed)] == max(plain.values())
+
+    assert dict(indexed) == plain
+    assert sorted(indexed._index.values()) == indexed._index.values()
+    assert indexed.between(10, 20) == {k: v for k, v in plain.items() if 10 <= v <= 20}
+
+
+def test_sorted_index_chunks_match_a_sorted_list(monkeypatch):
+    monkeypatch.setattr(_SortedIndex, "_LOAD", 4)  # split and merge constantly
+    rng = random.Random(5)
+    index = _SortedIndex((f"k{i}", rng.randrange(10)) for i in range(50))
+    model = dict(zip(index.keys(), index.values()))
+    order = list(model)  # insertion order breaks ties
+    for _ in range(3000):
+        key = f"k{rng.randrange(80)}"
+        if key in model:
+            index.remove(key)
+            del model[key]
+            order.remove(key)
+        if rng.random() < 0.6:
+            model[key] = rng.randrange(10)  # few values: long tie runs
+            index.add(key, model[key])
+            order.append(key)
+        expected = sorted(order, key=model.__getitem__)
+        assert index.keys() == expected and len(index) == len(expected)
+        value = rng.randrange(-1, 11)
+        start, stop = index.bounds("==", value)
+        assert index.keys(start, stop) == [k for k in expected if model[k] == value]
+        start, stop = index.bounds(">", value)
+        assert index.keys(start, stop) == [k for k in expected if model[k] > value]
+        if expected:
+            top = max(model.values())
+            assert index.first_max_key() == next(k for k in expected if model[k] == top)
+
+def test_sorted_index_removes_by_key():
+    index = _SortedIndex([("a", 5), ("b", 5), ("c", 1)])
+    assert index.get("b") == 5 and "b" in index and index.get("x") is None
+    index.remove("a")  # the stored value finds the entry, never a neighbour's
+    assert index.keys() == ["c", "b"]
+    with pytest.raises(KeyError):
+        index.remove("a")
+    with pytest.raises(KeyError):
+        index.add("b", 7)
+
+def test_value_indexed_dict_mapping_api():
+    data = ValueIndexedDict({"a": 10, "b": 50, "c": 20})
+    assert find_max_value_key(data) == "b"
+    data.update({"b": 1, "d": 99})
+    assert data.pop("d") == 99
+    assert data.setdefault("e", 30) == 30
+    assert find_max_value_key(data) == "e"
+    assert data.greater_than(15) == {"c": 20, "e": 30}
+    data.clear()
+    assert find_max_value_key(data) is None
+    assert data.greater_than(0) == {}
+
+
+def test_value_indexed_dict_keys_need_not_be_comparable():
+    data = ValueIndexedDict({1: 5, "a": 5, (2,): 3})
+    assert data.greater_than(4) == {1: 5, "a": 5}
+    del data[1]
+    data[None] = 5
+    assert list(data.between(5, 5)) == ["a", None]
+    assert find_max_value_key(data) == "a"
+
+
+def test_key_indexed_dict_prefix_queries():
+    rng = random.Random(5)
+    prefixes = ["prod_", "dev_", "prod_eu_", "tenant\U0010ffff", ""]
+    plain = {}
+    indexed = KeyIndexedDict()
+    for step in range(3000):
+        key = rng.choice(prefixes) + str(rng.randrange(200))
+        if rng.random() < 0.25:
+            plain.pop(key, None)
+            indexed.pop(key, None)
+        else:
+            plain[key] = indexed[key] = step
+
+    assert dict(indexed) == plain
+    for prefix in prefixes + ["prod", "p", "tenant", "zzz", "prod_eu_1"]:
+        expected = filter_by_key_startswith(plain, prefix)
+        assert filter_by_key_startswith(indexed, prefix) == expected
+        assert indexed.count_prefix(prefix) == len(expected)
+
+
+def test_flatten_deep_round_trip():
+    data = {
+        "user": {"id": 1, "name": "Raj", "address": {"city": "Chennai", "geo": {"lat": 13.0}}},
+        "meta": {"active": True, "tags": ["a", "b"], "extra": {}},
+        "version": 3,
+    }
+    flat = flatten_deep(data)
+    assert flat == {
+        "user.id": 1,
+        "user.name": "Raj",
+        "user.address.city": "Chennai",
+        "user.address.geo.lat": 13.0,
+        "meta.active": True,
+        "meta.tags": ["a", "b"],
+        "meta.extra": {},
+        "version": 3,
+    }
+    assert unflatten(flat) == data
+    assert unflatten(iter_flatten(data, tuple_paths=True)) == data
+    assert flatten_deep(data, sep="/")["user/address/geo/lat"] == 13.0
+    assert unflatten(flatten_deep({1: {2: 3}})) == {"1": {"2": 3}}
+    assert unflatten(iter_flatten({1: {2: 3}}, tuple_paths=True)) == {1: {2: 3}}
+    assert count_leaves(data) == 8
+
+
+def test_unflatten_rejects_paths_through_leaves():
+    with pytest.raises(ValueError, match=r"'a\.b\.c'.*'a\.b'"):
+        unflatten({"a.b": 1, "a.b.c": 2})
+    with pytest.raises(ValueError, match=r"\('a',\)"):
+        unflatten([(("a",), None), (("a", "b"), 2)])
+
+
+def test_iter_flatten_interns_segments():
+    # Keys built at runtime are distinct str objects with equal text.
+    records = [{"".join(["us", "er"]): {"".join(["na", "me"]): i}} for i in range(2)]
+    paths = [path for record in records
+             for path, _ in iter_flatten(record, tuple_paths=True, intern=True)]
+    assert paths[0] == paths[1] == ("user", "name")
+    assert all(a is b for a, b in zip(paths[0], paths[1]))
+    strings = [path for record in records for path, _ in iter_flatten(record, intern=True)]
+    assert strings[0] is strings[1]
+
+
+def test_flatten_deep_matches_one_level_helper():
+    data = {"user": {"id": 1, "name": "Raj"}, "meta": {"active": True}}
+    assert flatten_deep(data) == flatten_nested_dictionary(data)
+
+
+def test_flatten_deep_beyond_recursion_limit():
+    depth = sys.getrecursionlimit() * 5
+    data = leaf = {}
+    for level in range(depth):
+        leaf["n"] = {}
+        leaf = leaf["n"]
+    leaf["value"] = 1
+
+    ((path, value),) = iter_flatten(data, tuple_paths=True)
+    assert len(path) == depth + 1 and value == 1
+
+    # Walk the rebuilt tree by hand: == on it would itself recurse.
+    node = unflatten([(path, value)])
+    for _ in range(depth):
+        node = node["n"]
+    assert node == {"value": 1}
+
+
+def test_q_expresses_existing_helpers():
+    data = {"prod_1": 10, "dev_1": 5, "prod_2": 20, "dev_2": -3, "prod_3": 7}
+    nested = {"user1": {"score": 80}, "user2": {"score": 40}, "user3": {}}
+
+    assert Q(data).where(lambda v: v > 6).to_dict() == filter_by_value_greater_than(data, 6)
+    assert Q(data).where_key(lambda k: k.startswith("prod")).to_dict() == \
+        filter_by_key_startswith(data, "prod")
+    assert Q(data).map_values(lambda v: v * 2).to_dict() == map_values_double(data)
+    assert Q(data).map_values(lambda v: v * 2 if v % 2 == 0 else v).to_dict() == \
+        map_values_conditionally(data)
+    assert Q(data).sum() == reduce_sum_of_values(data)
+    assert Q(data).any(lambda v: v > 15) == any_value_above_threshold(data, 15)
+    assert Q(data).all(lambda v: v > 0) == all_values_positive(data)
+    assert Q(data).max_key() == find_max_value_key(data)
+    assert Q({}).max_key() == find_max_value_key({})
+    assert Q(nested).where(lambda v: v.get("score", 0) > 50).to_dict() == \
+        filter_nested_dictionary(nested, 50)
+
+
+def test_q_chains_match_eager_helpers():
+    data = {f"k{i}": i - 50 for i in range(200)}
+    eager = map_values_conditionally(map_values_double(filter_by_value_greater_than(data, 0)))
+
+    query = (Q(data).where(lambda v: v > 0)
+             .map_values(lambda v: v * 2).map_values(lambda v: v * 2 if v % 2 == 0 else v))
+    assert query.to_dict() == eager
+    assert query.sum() == reduce_sum_of_values(eager)
+    assert query.where_key(lambda k: k.endswith("9")).count() == \
+        len([k for k in eager if k.endswith("9")])
+    assert query.max_key() == find_max_value_key(eager)
+
+    # Queries are immutable: branching does not affect the parent.
+    assert query.where(lambda v: v > 10**9).to_dict() == {}
+    assert query.to_dict() == eager
+
+
+def _random_users(count, seed=11):
+    rng = random.Random(seed)
+    users = {}
+    for i in range(count):
+        record = {"region": rng.choice(["eu", "us", "apac"]), "age": rng.randrange(18, 80)}
+        if rng.random() < 0.9:
+            record["score"] = rng.randrange(100)
+        users[f"user{i}"] = record
+    return users
+
+
+def test_record_store_matches_filter_nested_dictionary():
+    users = _random_users(500)
+    store = RecordStore(users, indexes=("score", "region"), defaults={"score": 0})
+
+    for threshold in (-1, 0, 50, 99):
+        assert store.query(score=(">", threshold)) == filter_nested_dictionary(users, threshold)
+    assert filter_nested_dictionary(store, 50) == filter_nested_dictionary(users, 50)
+
+    expected = {k: v for k, v in users.items()
+                if v.get("score", 0) > 50 and v["region"] == "eu" and v["age"] < 30}
+    assert store.query(score=(">", 50), region="eu", age=("<", 30)) == expected
+
+
+def test_record_store_reassigning_a_mutated_record():
+    store = RecordStore({"a": {"score": 1}, "b": {"score": 5}}, indexes=("score",))
+    record = store["a"]
+    record["score"] = 5
+    store["a"] = record
+    assert store.query(score=(">", 3)) == {"a": {"score": 5}, "b": {"score": 5}}
+    del store["a"]
+    assert store.query(score=5) == {"b": {"score": 5}}
+    record = store["b"]
+    del record["score"]  # leaves the index
+    store["b"] = record
+    assert store.query(score=(">=", 0)) == {}
+
+def test_record_store_keeps_indexes_current():
+    rng = random.Random(2)
+    users = _random_users(200)
+    store = RecordStore(users, indexes=("score", "region", "age"))
+    for step in range(1000):
+        user_id = f"user{rng.randrange(250)}"
+        action = rng.random()
+        if action < 0.2 and user_id in users:
+            del users[user_id]
+            del store[user_id]
+        elif action < 0.6 and user_id in users:
+            users[user_id] = {**users[user_id], "score": rng.randrange(100)}
+            store.update_record(user_id, score=users[user_id]["score"])
+        else:
+            users[user_id] = store[user_id] = {"region": rng.choice(["eu", "us"]),
+                                               "age": rng.randrange(18, 80)}
+
+    expected = {k: v for k, v in users.items()
+                if v.get("score", -1) >= 40 and v["region"] == "us" and v["age"] <= 50}
+    assert store.query(score=(">=", 40), region="us", age=("<=", 50)) == expected
+    assert store.query(region="apac") == {k: v for k, v in users.items() if v["region"] == "apac"}
+    with pytest.raises(ValueError):
+        store.query(score=("!=", 1))
+
+
+def _slow_square(value):
+    total = 0
+    for _ in range(200):
+        total += value
+    return total * value // 200
+
+
+def test_parallel_helpers_match_serial():
+    data = {f"prod_{i}" if i % 3 else f"dev_{i}": i for i in range(5000)}
+
+    for workers in (1, 2):
+        assert map_values_double(data, workers=workers) == map_values_double(data)
+        assert map_values_conditionally(data, workers=workers) == map_values_conditionally(data)
+        assert filter_by_value_greater_than(data, 2500, workers=workers) == \
+            filter_by_value_greater_than(data, 2500)
+        assert filter_by_key_startswith(data, "dev", workers=workers) == \
+            filter_by_key_startswith(data, "dev")
+
+    forced = parallel_map_values(data, _slow_square, workers=2, min_parallel_seconds=0)
+    assert list(forced) == list(data)
+    assert forced == {k: v * v for k, v in data.items()}
+    assert parallel_filter({}, bool, workers=2, min_parallel_seconds=0) == {}
+    with pytest.raises(ValueError):
+        parallel_filter(data, bool, by="item")
+
+
+def test_parallel_stays_serial_for_cheap_work(monkeypatch):
+    monkeypatch.setattr(sys.modules[__name__], "ProcessPoolExecutor", None)
+    data = {i: i for i in range(100)}
+    # A pool would fail here (ProcessPoolExecutor is None): must stay serial.
+    assert parallel_map_values(data, _double, workers=4) == map_values_double(data)
+
+
+def test_aggregate_dict_matches_helpers_under_random_mutation():
+    for seed in range(5):
+        rng = random.Random(seed)
+        plain = {}
+        live = AggregateDict({"seed": 3})
+        plain["seed"] = 3
+        for _ in range(1500):
+            key = rng.randrange(60)
+            action = rng.random()
+            if action < 0.25 and key in plain:
+                del plain[key]
+                del live[key]
+            elif action < 0.3:
+                assert live.pop(key, None) == plain.pop(key, None)
+            else:
+                plain[key] = live[key] = rng.randrange(-20, 100)
+
+            assert len(live) == len(plain)
+            assert reduce_sum_of_values(live) == reduce_sum_of_values(plain)
+            assert all_values_positive(live) == all_values_positive(plain)
+            threshold = rng.randrange(-30, 110)
+            assert any_value_above_threshold(live, threshold) == \
+                any_value_above_threshold(plain, threshold)
+            max_key = find_max_value_key(live)
+            assert (max_key is None) == (not plain)
+            if plain:
+                assert plain[max_key] == max(plain.values())
+        assert len(live._heap) <= 2 * len(live) + 65
+
+
+def test_aggregate_dict_empty_and_clear():
+    live = AggregateDict({"a": 1, "b": -1})
+    assert all_values_positive(live) is False
+    live.clear()
+    assert reduce_sum_of_values(live) == 0
+    assert find_max_value_key(live) is None
+    assert any_value_above_threshold(live, 0) is False
+    assert all_values_positive(live) is True
+
+
+def test_prefix_successor():
+    assert _prefix_successor("prod") == "proe"
+    assert _prefix_successor("a\U0010ffff") == "b"
+    assert _prefix_successor("") is None
+
+
+# =========================
+# Benchmark Section
+# =========================
+
+def _time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark_value_indexed_dict(sizes=(10**4, 10**6, 10**7), queries=20, updates=10_000):
+    """
+    filter_by_value_greater_than on a plain dict vs a ValueIndexedDict,
+    with thresholds selecting about 1% of the items, and the cost of
+    updating one existing key in each.
+    """
+    results = {}
+    for size in sizes:
+        data = {f"key{i}": random.random() for i in range(size)}
+        start = time.perf_counter()
+        indexed = ValueIndexedDict(data)
+        build = time.perf_counter() - start
+
+        thresholds = [0.99 + random.random() / 100 for _ in range(queries)]
+        scan = _time_per_call(lambda: [filter_by_value_greater_than(data, t) for t in thresholds], 1)
+        query = _time_per_call(lambda: [indexed.greater_than(t) for t in thresholds], 1)
+        max_plain = _time_per_call(lambda: find_max_value_key(data), 1)
+        max_indexed = _time_per_call(lambda: find_max_value_key(indexed), 1000)
+
+        changes = [(f"key{random.randrange(size)}", random.random()) for _ in range(updates)]
+        write_plain = _time_per_call(lambda: [data.__setitem__(*c) for c in changes], 1)
+        write_indexed = _time_per_call(lambda: [indexed.__setitem__(*c) for c in changes], 1)
+
+        results[size] = (build, scan / queries, query / queries, write_indexed / updates)
+        print(f"n={size:>10,}  build {build:>7.3f}s  "
+              f"comprehension {scan / queries * 1e3:>9.3f}ms  "
+              f"indexed {query / queries * 1e3:>9.3f}ms  "
+              f"max {max_plain * 1e3:>8.3f}ms -> {max_indexed * 1e6:.2f}us  "
+              f"update {write_plain / updates * 1e6:.2f}us -> "
+              f"{write_indexed / updates * 1e6:.2f}us")
+    return results
+
+
+def benchmark_key_indexed_dict(size=1_000_000, tenants=1000, queries=1000):
+    """
+    filter_by_key_startswith scan vs KeyIndexedDict prefix queries,
+    plus the memory the sorted key index adds.
+    """
+    data = {f"{env}_t{i % tenants}_{i}": i
+            for i, env in zip(range(size), ["prod", "dev"] * (size // 2 + 1))}
+    start = time.perf_counter()
+    indexed = KeyIndexedDict(data)
+    build = time.perf_counter() - start
+
+    prefixes = [f"prod_t{random.randrange(tenants)}_" for _ in range(queries)]
+    scans = max(queries // 100, 1)
+    scan = _time_per_call(lambda: [filter_by_key_startswith(data, p) for p in prefixes[:scans]], 1)
+    query = _time_per_call(lambda: [indexed.with_prefix(p) for p in prefixes], 1)
+
+    dict_bytes = sys.getsizeof(data)
+    print(f"n={size:,}  build {build:.3f}s")
+    print(f"scan     {scan / scans * 1e3:>10.3f}ms/query")
+    print(f"indexed  {query / queries * 1e3:>10.3f}ms/query  "
+          f"({queries / query:,.0f} queries/sec)")
+    print(f"index    {indexed.index_bytes() / 2**20:>10.1f}MiB on top of "
+          f"{dict_bytes / 2**20:.1f}MiB dict table")
+    return {"build": build, "scan": scan / scans, "indexed": query / queries,
+            "index_bytes": indexed.index_bytes()}
+
+
+def _measure(func):
+    """
+    Return (result, seconds, peak traced bytes). Time and memory come
+    from separate runs since tracemalloc slows allocation down.
+    """
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_q(size=1_000_000):
+    """
+    Eager helper chains (one dict per step) vs the fused Q pass,
+    for chains of 3, 4 and 5 operations.
+    """
+    data = {f"key{i}": i for i in range(size)}
+
+    chains = {
+        3: (lambda: reduce_sum_of_values(map_values_double(filter_by_value_greater_than(data, 10))),
+            lambda: Q(data).where(lambda v: v > 10).map_values(lambda v: v * 2).sum()),
+        4: (lambda: reduce_sum_of_values(map_values_conditionally(map_values_double(
+                filter_by_value_greater_than(data, 10)))),
+            lambda: Q(data).where(lambda v: v > 10).map_values(lambda v: v * 2)
+                .map_values(lambda v: v * 2 if v % 2 == 0 else v).sum()),
+        5: (lambda: find_max_value_key(map_values_conditionally(map_values_double(
+                filter_by_value_greater_than(filter_by_key_startswith(data, "key1"), 10)))),
+            lambda: Q(data).where_key(lambda k: k.startswith("key1")).where(lambda v: v > 10)
+                .map_values(lambda v: v * 2).map_values(lambda v: v * 2 if v % 2 == 0 else v)
+                .max_key()),
+    }
+
+    results = {}
+    for length, (eager, lazy) in chains.items():
+        expected, eager_seconds, eager_peak = _measure(eager)
+        result, lazy_seconds, lazy_peak = _measure(lazy)
+        assert result == expected
+        results[length] = (eager_seconds, lazy_seconds, eager_peak, lazy_peak)
+        print(f"{length} ops  eager {eager_seconds:>7.3f}s {eager_peak / 2**20:>8.1f}MiB   "
+              f"Q {lazy_seconds:>7.3f}s {lazy_peak / 2**20:>8.1f}MiB")
+    return results
+
+
+def _flatten_recursive(nested, prefix=""):
+    """
+    Straightforward recursive flatten, used as a benchmark baseline.
+    """
+    result = {}
+    for key, value in nested.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            result.update(_flatten_recursive(value, f"{path}."))
+        else:
+            result[path] = value
+    return result
+
+
+def benchmark_flatten(wide_leaves=500_000, deep_levels=200_000):
+    """
+    Iterative flatten/unflatten on a wide tree (vs the recursive baseline)
+    and on a tree far deeper than the recursion limit.
+    """
+    wide = {f"service{s}": {f"region{r}": {f"key{k}": k for k in range(50)}
+                            for r in range(100)}
+            for s in range(max(wide_leaves // 5000, 1))}
+    deep = leaf = {}
+    for _ in range(deep_levels):
+        leaf["child"] = {}
+        leaf = leaf["child"]
+    leaf["value"] = 1
+
+    results = {}
+    for label, func in [
+        ("wide recursive", lambda: _flatten_recursive(wide)),
+        ("wide iterative", lambda: flatten_deep(wide)),
+        ("wide interned", lambda: dict(iter_flatten(wide, intern=True))),
+        ("wide tuple paths", lambda: flatten_deep(wide, tuple_paths=True)),
+        ("wide unflatten", lambda: unflatten(flat_wide)),
+        ("deep iterative", lambda: flatten_deep(deep, tuple_paths=True)),
+    ]:
+        start = time.perf_counter()
+        result = func()
+        results[label] = time.perf_counter() - start
+        if label == "wide iterative":
+            flat_wide = result
+        print(f"{label:<18} {results[label]:>8.3f}s")
+
+    try:
+        _flatten_recursive(deep)
+    except RecursionError:
+        print("deep recursive     RecursionError")
+    return results
+
+
+def benchmark_record_store(size=1_000_000, queries=20, updates=100_000):
+    """
+    Compound query vs a filter_nested_dictionary-style scan, and the cost
+    of keeping 0, 1 and 2 indexes current on insert/update/delete.
+    """
+    users = _random_users(size)
+    store = RecordStore(users, indexes=("score", "region"), defaults={"score": 0})
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        expected = {k: v for k, v in users.items()
+                    if v.get("score", 0) > 95 and v["region"] == "eu"}
+    scan = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        result = store.query(score=(">", 95), region="eu")
+    query = (time.perf_counter() - start) / queries
+    assert result == expected
+    print(f"n={size:,}  scan {scan * 1e3:.2f}ms  indexed {query * 1e3:.2f}ms per query")
+
+    rng = random.Random(1)
+    ids = [f"user{rng.randrange(size)}" for _ in range(updates)]
+    results = {"scan": scan, "query": query}
+    for indexes in [(), ("score",), ("score", "region")]:
+        target = RecordStore(users, indexes=indexes)
+        start = time.perf_counter()
+        for i, user_id in enumerate(ids):
+            if i % 3 == 0 and user_id in target:
+                target.update_record(user_id, score=i % 100)
+            elif i % 3 == 1:
+                target.pop(user_id, None)
+            else:
+                target[user_id] = {"region": "us", "score": i % 100}
+        seconds = time.perf_counter() - start
+        results[indexes] = seconds
+        print(f"{len(indexes)} indexes  {updates / seconds:>12,.0f} writes/sec")
+    return results
+
+
+def benchmark_parallel(sizes=(10_000, 100_000, 1_000_000), workers=None):
+    """
+    Serial comprehension vs parallel_map_values with an expensive value
+    function, forcing the pool on so the crossover point is visible.
+    """
+    results = {}
+    for size in sizes:
+        data = {f"key{i}": i for i in range(size)}
+        start = time.perf_counter()
+        expected = {k: _slow_square(v) for k, v in data.items()}
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = parallel_map_values(data, _slow_square, workers=workers, min_parallel_seconds=0)
+        parallel = time.perf_counter() - start
+        assert result == expected
+
+        estimate = _estimated_serial_seconds(_slow_square, list(data.values()))
+        results[size] = (serial, parallel)
+        print(f"n={size:>10,}  serial {serial:>7.3f}s  parallel {parallel:>7.3f}s  "
+              f"(estimate {estimate:.3f}s, auto -> "
+              f"{'parallel' if estimate >= PARALLEL_MIN_SECONDS else 'serial'})")
+    return results
+
+
+def benchmark_aggregate_dict(size=1_000_000, rounds=1000, changes=5):
+    """
+    Re-walking every value per query vs the running aggregates, on a
+    dict that changes by a few keys between queries.
+    """
+    rng = random.Random(4)
+    plain = {i: rng.randrange(1, 1000) for i in range(size)}
+    live = AggregateDict(plain)
+
+    def mutate(target, step):
+        for change in range(changes):
+            target[(step * 7919 + change) % size] = (step * 31 + change) % 1000 + 1
+
+    def queries(target):
+        return (reduce_sum_of_values(target), find_max_value_key(target),
+                any_value_above_threshold(target, 990), all_values_positive(target))
+
+    walked = max(rounds // 100, 1)
+    start = time.perf_counter()
+    for step in range(walked):
+        mutate(plain, step)
+        queries(plain)
+    full = (time.perf_counter() - start) / walked
+
+    start = time.perf_counter()
+    for step in range(rounds):
+        mutate(live, step)
+        queries(live)
+    incremental = (time.perf_counter() - start) / rounds
+
+    print(f"n={size:,}  full walk {full * 1e3:>9.3f}ms/round  "
+          f"incremental {incremental * 1e6:>8.2f}us/round")
+    return {"full": full, "incremental": incremental}
+
+
+if __name__ == "__main__":
+    benchmark_value_indexed_dict()
+    benchmark_key_indexed_dict()
+    benchmark_q()
+    benchmark_flatten()
+    benchmark_record_store()
+    benchmark_parallel()
+    benchmark_aggregate_dict()
\ No newline at end of file